@@ -89,6 +89,13 @@ DATABASES = {
     "default": env.db("DATABASE_URL"),
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    "default": env.cache("CACHE_URL", default="locmemcache://"),
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -137,3 +144,46 @@ REST_FRAMEWORK = {
 
 CELERY_BROKER_URL = env.str("CELERY_BROKER_URL")
 CELERY_RESULT_BACKEND = env.str("CELERY_RESULT_BACKEND")
+
+# Кеш результатов разбора загруженных файлов
+PARSE_CACHE_DIR = env.str("PARSE_CACHE_DIR", default="files/parse_cache")
+PARSE_CACHE_MAX_SIZE = env.int("PARSE_CACHE_MAX_SIZE", default=512 * 1024 * 1024)
+
+# Кеш справочников: сколько снимков держать в памяти процесса и сколько жить в redis.
+# Работает только с общим для процессов CACHE_URL, с locmem справочники не кешируются
+HANDBOOK_CACHE = env.bool("HANDBOOK_CACHE", default=True)
+HANDBOOK_LOCAL_CACHE_SIZE = env.int("HANDBOOK_LOCAL_CACHE_SIZE", default=32)
+HANDBOOK_CACHE_TIMEOUT = env.int("HANDBOOK_CACHE_TIMEOUT", default=24 * 60 * 60)
+
+# Сколько ошибок загрузки отдавать в ответе задачи, полный перечень пишется в файл
+IMPORT_ERRORS_TOP_N = env.int("IMPORT_ERRORS_TOP_N", default=100)
+
+# Сколько подключений connectorx открывать одновременно для запросов одного отчета
+CONNECTORX_MAX_CONNECTIONS = env.int("CONNECTORX_MAX_CONNECTIONS", default=4)
+# На сколько частей по диапазонам id скважин делить чтение фонда в отчетах,
+# 1 - одним подключением
+CONNECTORX_PARTITION_NUM = env.int("CONNECTORX_PARTITION_NUM", default=1)
+
+# Загружаемые файлы пишутся частями сразу в спул, без чтения в память
+UPLOAD_SPOOL_DIR = env.str("UPLOAD_SPOOL_DIR", default="files/spool")
+UPLOAD_MAX_SIZE = env.int("UPLOAD_MAX_SIZE", default=100 * 1024 * 1024)
+
+# Замеры этапов импорта пишутся одной строкой json на задачу
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {"json_line": {"format": "%(message)s"}},
+    "handlers": {
+        "import_profile": {
+            "class": "logging.StreamHandler",
+            "formatter": "json_line",
+        },
+    },
+    "loggers": {
+        "common.profiling": {
+            "handlers": ["import_profile"],
+            "level": env.str("IMPORT_PROFILE_LOG_LEVEL", default="INFO"),
+            "propagate": False,
+        },
+    },
+}
@@ -0,0 +1,129 @@
+import platform
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+import polars as pl
+from common.profiling import count_rows
+from django.db import connection
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Замер одного этапа
+
+    Attributes:
+        case (str): этап
+        scale (int): масштаб данных, например строк на лист или скважин
+        rows (Optional[int]): строк на выходе этапа
+        times (list[float]): время каждого повтора, сек
+    """
+
+    case: str
+    scale: int
+    rows: Optional[int] = None
+    times: list[float] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return {
+            **asdict(self),
+            "min": min(self.times),
+            "median": statistics.median(self.times),
+            "max": max(self.times),
+        }
+
+
+class Benchmark:
+    """
+    Базовый класс замеров этапов на синтетических данных
+
+    Результат - json с окружением, который сравнивается между релизами
+    """
+
+    def __init__(self, repeat: int = 3) -> None:
+        self.repeat = repeat
+        self.results: list[BenchmarkResult] = []
+
+    def as_json(self) -> dict:
+        """
+        Замеры с окружением для сравнения между релизами
+
+        Returns:
+            dict: окружение и замеры
+        """
+
+        return {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "environment": {
+                "python": platform.python_version(),
+                "polars": pl.__version__,
+                "database": connection.vendor,
+                "machine": platform.machine(),
+            },
+            "results": [result.as_dict() for result in self.results],
+        }
+
+    @staticmethod
+    def compare(current: dict, baseline: dict) -> list[dict]:
+        """
+        Сравнение медиан с прошлым запуском
+
+        Args:
+            current (dict): замеры текущего запуска
+            baseline (dict): замеры прошлого запуска
+
+        Returns:
+            list[dict]: этап, масштаб, медианы и отношение текущей к прошлой
+        """
+
+        baseline_results = {
+            (result["case"], result["scale"]): result["median"]
+            for result in baseline["results"]
+        }
+        return [
+            {
+                "case": result["case"],
+                "scale": result["scale"],
+                "baseline": baseline_results[key],
+                "current": result["median"],
+                "ratio": round(result["median"] / baseline_results[key], 3),
+            }
+            for result in current["results"]
+            if (key := (result["case"], result["scale"])) in baseline_results
+            and baseline_results[key]
+        ]
+
+    def _measure(
+        self,
+        case: str,
+        scale: int,
+        func: Callable,
+        setup: Optional[Callable] = None,
+    ) -> Any:
+        """
+        Повторный замер функции
+
+        Args:
+            case (str): этап
+            scale (int): масштаб данных
+            func (Callable): замеряемая функция
+            setup (Optional[Callable]): подготовка перед каждым повтором, не замеряется,
+                ее результат передается в func
+
+        Returns:
+            Any: результат последнего повтора
+        """
+
+        result = BenchmarkResult(case=case, scale=scale)
+        for _ in range(self.repeat):
+            args = (setup(),) if setup is not None else ()
+            start = time.perf_counter()
+            output = func(*args)
+            result.times.append(round(time.perf_counter() - start, 4))
+
+        result.rows = count_rows(output)
+        self.results.append(result)
+        return output
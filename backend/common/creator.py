@@ -1,10 +1,73 @@
 from abc import abstractmethod
-from functools import reduce
+from dataclasses import dataclass, field
+from io import BytesIO
 
-from django.db import models
+import polars as pl
+from common.enums import DictedEnum
+from common.profiling import ProfiledMixin
+from django.db import connection, models, transaction
+from django.db.models.deletion import Collector
+from django.utils import timezone
 
 
-class DefaultCreator:
+class UpdateStrategy(DictedEnum):
+    """
+    Способы массового обновления строк
+    """
+
+    # django bulk_update, CASE WHEN на каждое поле
+    BULK_UPDATE = "bulk_update"
+    # UPDATE ... FROM (VALUES ...) пачками
+    VALUES = "values"
+    # COPY во временную таблицу и один UPDATE ... FROM
+    COPY = "copy"
+
+
+@dataclass
+class DeltaInstances:
+    """
+    Разница между загружаемыми данными и данными в БД
+    """
+
+    to_create: pl.DataFrame = field(default_factory=pl.DataFrame)
+    to_update: pl.DataFrame = field(default_factory=pl.DataFrame)
+    to_delete: list[int] = field(default_factory=list)
+
+    def get_statistic(self) -> dict[str, int]:
+        """
+        Количество изменённых строк
+
+        Returns:
+            dict[str, int]: сколько строк добавлено, изменено и удалено
+        """
+
+        return {
+            "created": len(self.to_create),
+            "updated": len(self.to_update),
+            "deleted": len(self.to_delete),
+        }
+
+
+class DefaultCreator(ProfiledMixin):
+    # этапы записи, замеряемые в импорте (common.profiling)
+    profiled_methods = (
+        "create_instances",
+        "upsert_instances",
+        "create_delta",
+        "save_instances_to_db",
+        "copy_instances_to_db",
+        "update_instances_to_db",
+        "delete_instances_to_db",
+        "get_delta_instances",
+        "save_delta_to_db",
+    )
+    # писать ли датафреймы в postgres через COPY, минуя инстансы моделей
+    use_copy: bool = False
+    # сколько строк отправлять одним COPY
+    copy_batch_size: int = 100_000
+    # способ обновления строк, кроме bulk_update работает только на postgres
+    update_strategy: UpdateStrategy = UpdateStrategy.BULK_UPDATE
+
     @abstractmethod
     def create_instances(self):
         """
@@ -13,41 +76,392 @@ class DefaultCreator:
         raise NotImplementedError()
 
     def save_instances_to_db(
-        self, django_model: models, objects_to_create, batch_size: int = 300
+        self,
+        django_model: models,
+        objects_to_create: list[dict] | pl.DataFrame,
+        batch_size: int = 300,
     ) -> None:
         """
         Метод для сохранения списка инстансов
+
+        Датафрейм при включенном use_copy пишется через COPY, на остальных
+        БД (например sqlite) - через bulk_create
         """
+
+        if isinstance(objects_to_create, pl.DataFrame):
+            if self.use_copy and connection.vendor == "postgresql":
+                return self.copy_instances_to_db(django_model, objects_to_create)
+
+            objects_to_create = objects_to_create.to_dicts()
+
         return django_model.objects.bulk_create(
             [django_model(**vals) for vals in objects_to_create], batch_size=batch_size
         )
 
+    def copy_instances_to_db(
+        self,
+        django_model: models,
+        data: pl.DataFrame,
+    ) -> None:
+        """
+        Метод для записи датафрейма в postgres через COPY FROM STDIN
+
+        Колонки датафрейма - attname полей модели (indicator_id и т.п.),
+        поля с auto_now/auto_now_add и дефолтами заполняются как в bulk_create
+
+        Args:
+            django_model (models): модель
+            data (pl.DataFrame): данные для записи
+        """
+
+        data = self.__fill_missing_fields(django_model, data)
+
+        with connection.cursor() as cursor:
+            self.__copy_frame(
+                cursor,
+                connection.ops.quote_name(django_model._meta.db_table),
+                self.__get_db_columns(django_model, data.columns),
+                data,
+            )
+
     def update_instances_to_db(
         self,
         django_model,
-        objects_to_update,
+        objects_to_update: list[dict] | pl.DataFrame,
         fields_to_update: list,
         batch_size: int = 300,
     ) -> None:
         """
         Метод для сохранения списка инстансов
+
+        Способ обновления задается update_strategy, на БД кроме postgres
+        всегда используется bulk_update
         """
-        django_model.objects.bulk_update(
-            [django_model(**vals) for vals in objects_to_update],
-            fields_to_update,
-            batch_size=batch_size,
+
+        if (
+            self.update_strategy == UpdateStrategy.BULK_UPDATE
+            or connection.vendor != "postgresql"
+        ):
+            if isinstance(objects_to_update, pl.DataFrame):
+                objects_to_update = objects_to_update.to_dicts()
+
+            django_model.objects.bulk_update(
+                [django_model(**vals) for vals in objects_to_update],
+                fields_to_update,
+                batch_size=batch_size,
+            )
+            return
+
+        if len(objects_to_update) == 0:
+            return
+
+        if not isinstance(objects_to_update, pl.DataFrame):
+            objects_to_update = pl.DataFrame(objects_to_update)
+        data = objects_to_update.select(
+            pl.col("pk" if "pk" in objects_to_update.columns else "id").alias("pk"),
+            *fields_to_update,
         )
 
-    def delete_instances_to_db(self, django_model, objects_to_delete) -> None:
+        if self.update_strategy == UpdateStrategy.COPY:
+            self.__update_from_temp_table(django_model, data, fields_to_update)
+        else:
+            self.__update_from_values(django_model, data, fields_to_update, batch_size)
+
+    def delete_instances_to_db(
+        self,
+        django_model: models,
+        objects_to_delete: list[dict] | pl.DataFrame,
+        batch_size: int = 10_000,
+    ) -> int:
         """
         Метод для удаления списка инстансов
+
+        Ключи (attname полей модели или pk) отправляются пачками в одном запросе
+        WHERE (колонки) IN (VALUES ...), без отдельного фильтра на каждую строку.
+        Если у модели есть зависимые записи или сигналы на удаление, ключи
+        сначала переводятся в id, а удаляет уже django
+
+        Args:
+            django_model (models): модель
+            objects_to_delete (list[dict] | pl.DataFrame): ключи удаляемых строк
+            batch_size (int): сколько ключей отправлять одним запросом
+
+        Returns:
+            int: количество удаленных строк
         """
 
         if len(objects_to_delete) == 0:
-            return
+            return 0
+
+        if not isinstance(objects_to_delete, pl.DataFrame):
+            objects_to_delete = pl.DataFrame(objects_to_delete)
+        keys = objects_to_delete.unique()
+
+        max_query_params = connection.features.max_query_params
+        if max_query_params:
+            batch_size = min(batch_size, max_query_params // keys.width)
+
+        table = connection.ops.quote_name(django_model._meta.db_table)
+        columns = ", ".join(self.__get_db_columns(django_model, keys.columns))
+        is_fast_delete = Collector(using=connection.alias).can_fast_delete(django_model)
+
+        deleted = 0
+        with connection.cursor() as cursor:
+            for frame in keys.iter_slices(n_rows=batch_size):
+                values = ", ".join(
+                    ["(" + ", ".join(["%s"] * keys.width) + ")"] * len(frame)
+                )
+                params = [value for row in frame.iter_rows() for value in row]
+                condition = f"WHERE ({columns}) IN (VALUES {values})"
 
-        list_querysets = [
-            django_model.objects.filter(**vals) for vals in objects_to_delete
+                if is_fast_delete:
+                    cursor.execute(f"DELETE FROM {table} {condition}", params)
+                    deleted += cursor.rowcount
+                    continue
+
+                pk_column = connection.ops.quote_name(django_model._meta.pk.column)
+                cursor.execute(f"SELECT {pk_column} FROM {table} {condition}", params)
+                deleted_rows, _ = django_model.objects.filter(
+                    pk__in=[row[0] for row in cursor.fetchall()]
+                ).delete()
+                deleted += deleted_rows
+
+        return deleted
+
+    def get_delta_instances(
+        self,
+        data: pl.DataFrame,
+        current: pl.DataFrame,
+        key_columns: list[str],
+        value_columns: list[str],
+    ) -> DeltaInstances:
+        """
+        Сравнение загружаемых данных с данными в БД по ключевым колонкам
+
+        Одинаковые ключи сопоставляются по порядку появления, поэтому дубли
+        в файле не схлопываются и результат совпадает с полной перезаливкой
+
+        Args:
+            data (pl.DataFrame): загружаемые данные, колонки как в модели
+            current (pl.DataFrame): данные из БД, с колонкой id
+            key_columns (list[str]): колонки, по которым сопоставляются строки
+            value_columns (list[str]): колонки, изменение которых требует обновления
+
+        Returns:
+            DeltaInstances: строки на добавление, обновление и удаление
+        """
+
+        occurrence_column = "__occurrence"
+        new_column = "__is_new"
+        suffix = "__current"
+        join_columns = [*key_columns, occurrence_column]
+
+        joined = data.with_columns(
+            pl.int_range(pl.len()).over(key_columns).alias(occurrence_column),
+            pl.lit(True).alias(new_column),
+        ).join(
+            current.select("id", *key_columns, *value_columns).with_columns(
+                pl.int_range(pl.len()).over(key_columns).alias(occurrence_column)
+            ),
+            on=join_columns,
+            how="full",
+            coalesce=True,
+            suffix=suffix,
+        )
+
+        is_changed = pl.any_horizontal(
+            pl.col(column).ne_missing(pl.col(f"{column}{suffix}"))
+            for column in value_columns
+        )
+
+        to_create = joined.filter(pl.col("id").is_null()).select(data.columns)
+        to_update = joined.filter(
+            pl.col("id").is_not_null() & pl.col(new_column).is_not_null() & is_changed
+        ).select("id", *value_columns)
+        to_delete = joined.filter(pl.col(new_column).is_null()).get_column("id")
+
+        return DeltaInstances(
+            to_create=to_create,
+            to_update=to_update,
+            to_delete=to_delete.to_list(),
+        )
+
+    def save_delta_to_db(
+        self,
+        django_model: models,
+        delta: DeltaInstances,
+        fields_to_update: list,
+        batch_size: int = 300,
+    ) -> None:
+        """
+        Метод для записи в БД только изменившихся строк
+        """
+
+        self.delete_instances_to_db(django_model, pl.DataFrame({"pk": delta.to_delete}))
+
+        if not delta.to_update.is_empty():
+            self.update_instances_to_db(
+                django_model, delta.to_update, fields_to_update, batch_size
+            )
+
+        if not delta.to_create.is_empty():
+            self.save_instances_to_db(django_model, delta.to_create, batch_size)
+
+    @staticmethod
+    def __fill_missing_fields(django_model: models, data: pl.DataFrame) -> pl.DataFrame:
+        """
+        Заполнение полей, которые bulk_create заполняет сам
+
+        Args:
+            django_model (models): модель
+            data (pl.DataFrame): данные для записи
+
+        Returns:
+            pl.DataFrame: данные со всеми заполняемыми полями
+        """
+
+        now = timezone.now()
+        missing_fields = []
+        for model_field in django_model._meta.concrete_fields:
+            if model_field.primary_key or model_field.attname in data.columns:
+                continue
+
+            if getattr(model_field, "auto_now", False) or getattr(
+                model_field, "auto_now_add", False
+            ):
+                missing_fields.append(pl.lit(now).alias(model_field.attname))
+            elif model_field.has_default():
+                missing_fields.append(
+                    pl.lit(model_field.get_default()).alias(model_field.attname)
+                )
+
+        return data.with_columns(missing_fields)
+
+    @staticmethod
+    def __get_db_columns(django_model: models, columns: list[str]) -> list[str]:
+        """
+        Имена колонок в БД по attname полей модели
+
+        Args:
+            django_model (models): модель
+            columns (list[str]): attname полей, либо pk
+
+        Returns:
+            list[str]: экранированные имена колонок таблицы
+        """
+
+        fields = {
+            model_field.attname: model_field.column
+            for model_field in django_model._meta.concrete_fields
+        }
+        fields["pk"] = django_model._meta.pk.column
+
+        return [connection.ops.quote_name(fields[column]) for column in columns]
+
+    def __update_from_values(
+        self,
+        django_model: models,
+        data: pl.DataFrame,
+        fields_to_update: list,
+        batch_size: int,
+    ) -> None:
+        """
+        Обновление строк запросами UPDATE ... FROM (VALUES ...)
+
+        Args:
+            django_model (models): модель
+            data (pl.DataFrame): pk и новые значения полей
+            fields_to_update (list): обновляемые поля
+            batch_size (int): сколько строк отправлять одним запросом
+        """
+
+        table = connection.ops.quote_name(django_model._meta.db_table)
+        columns = self.__get_db_columns(django_model, data.columns)
+        # значения в VALUES приводим к типам колонок, иначе null-колонка станет text
+        db_types = [
+            model_field.cast_db_type(connection)
+            for model_field in [
+                django_model._meta.pk,
+                *map(django_model._meta.get_field, fields_to_update),
+            ]
         ]
+        row = "(" + ", ".join(f"%s::{db_type}" for db_type in db_types) + ")"
+        set_columns = ", ".join(f"{column} = v.{column}" for column in columns[1:])
+        sql = (
+            f"UPDATE {table} SET {set_columns} "
+            "FROM (VALUES {values}) AS v(" + ", ".join(columns) + ") "
+            f"WHERE {table}.{columns[0]} = v.{columns[0]}"
+        )
+
+        with connection.cursor() as cursor:
+            for frame in data.iter_slices(n_rows=batch_size):
+                cursor.execute(
+                    sql.format(values=", ".join([row] * len(frame))),
+                    [value for values in frame.iter_rows() for value in values],
+                )
+
+    def __update_from_temp_table(
+        self,
+        django_model: models,
+        data: pl.DataFrame,
+        fields_to_update: list,
+    ) -> None:
+        """
+        Обновление строк через временную таблицу: COPY в нее и один UPDATE ... FROM
+
+        Args:
+            django_model (models): модель
+            data (pl.DataFrame): pk и новые значения полей
+            fields_to_update (list): обновляемые поля
+        """
+
+        table = connection.ops.quote_name(django_model._meta.db_table)
+        temp_table = connection.ops.quote_name(
+            f"tmp_update_{django_model._meta.db_table}"
+        )
+        columns = self.__get_db_columns(django_model, data.columns)
+        set_columns = ", ".join(
+            f"{column} = {temp_table}.{column}" for column in columns[1:]
+        )
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            # структура временной таблицы копируется с основной, типы совпадают
+            cursor.execute(
+                f"CREATE TEMP TABLE {temp_table} ON COMMIT DROP AS "
+                f"SELECT {', '.join(columns)} FROM {table} WITH NO DATA"
+            )
+            self.__copy_frame(cursor, temp_table, columns, data)
+            cursor.execute(f"ANALYZE {temp_table}")
+            cursor.execute(
+                f"UPDATE {table} SET {set_columns} FROM {temp_table} "
+                f"WHERE {table}.{columns[0]} = {temp_table}.{columns[0]}"
+            )
+            cursor.execute(f"DROP TABLE {temp_table}")
+
+    def __copy_frame(
+        self,
+        cursor,
+        table: str,
+        columns: list[str],
+        data: pl.DataFrame,
+    ) -> None:
+        """
+        Отправка датафрейма в таблицу через COPY FROM STDIN пачками
+
+        Args:
+            cursor: курсор postgres
+            table (str): экранированное имя таблицы
+            columns (list[str]): экранированные имена колонок в порядке датафрейма
+            data (pl.DataFrame): данные
+        """
+
+        sql = (
+            f"COPY {table} ({', '.join(columns)}) "
+            "FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        )
 
-        reduce(self.__reduce_function, list_querysets).delete()
+        for frame in data.iter_slices(n_rows=self.copy_batch_size):
+            buffer = BytesIO()
+            frame.write_csv(buffer, include_header=False, null_value="\\N")
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
@@ -1,8 +1,59 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import quote
+
 import connectorx as cx
 import numpy as np
+import polars as pl
+from django.conf import settings
 from django.db import connections
 
 
+@dataclass(frozen=True)
+class SqlQuery:
+    """
+    Запрос на чтение через connectorx с настройками разбиения
+
+    По умолчанию запрос читается одним подключением. С partition_on connectorx
+    делит результат на partition_num диапазонов целочисленной колонки и читает
+    их параллельно отдельными подключениями, каждое со своим бэкендом postgres
+
+    Attributes:
+        sql (str): sql запрос, колонка partition_on должна быть в результате
+        partition_on (Optional[str]): колонка, по диапазонам которой делится чтение
+        partition_num (Optional[int]): количество частей, по умолчанию
+            CONNECTORX_MAX_CONNECTIONS из настроек, 1 - чтение без разбиения
+        partition_range (Optional[tuple[int, int]]): границы значений колонки,
+            без них connectorx считает MIN/MAX отдельным выполнением запроса
+    """
+
+    sql: str
+    partition_on: Optional[str] = None
+    partition_num: Optional[int] = None
+    partition_range: Optional[tuple[int, int]] = None
+
+    def get_read_options(self) -> dict:
+        """
+        Параметры разбиения для cx.read_sql
+
+        Returns:
+            dict: partition_on, partition_num и partition_range, либо пустой
+        """
+
+        if self.partition_on is None:
+            return {}
+
+        partition_num = self.partition_num or settings.CONNECTORX_MAX_CONNECTIONS
+        if partition_num <= 1:
+            return {}
+
+        options = {"partition_on": self.partition_on, "partition_num": partition_num}
+        if self.partition_range is not None:
+            options["partition_range"] = self.partition_range
+        return options
+
+
 class ConnectorManager:
     @classmethod
     def __create_db_url(cls) -> str:
@@ -16,9 +67,9 @@ class ConnectorManager:
                     -1
                 ],  # чтобы был postgresql а не django.backends...
                 "://",
-                default_settings["USER"],
+                quote(default_settings["USER"], safe=""),
                 ":",
-                default_settings["PASSWORD"],
+                quote(default_settings["PASSWORD"], safe=""),
                 "@",
                 default_settings["HOST"],
                 ":",
@@ -31,16 +82,118 @@ class ConnectorManager:
     @classmethod
     def get_raw_data(
         cls,
-        query: str,
+        query: str | SqlQuery,
     ) -> np.ndarray:
         """
         Метод отдающий np.array через connectorx
         """
 
+        return cls.get_raw_frame(query).to_numpy()
+
+    @classmethod
+    def get_raw_data_many(
+        cls, queries: list[str | SqlQuery], max_workers: Optional[int] = None
+    ) -> list[np.ndarray]:
+        """
+        Выполнение независимых запросов на чтение параллельно, в np.array
+
+        Args:
+            queries (list[str | SqlQuery]): sql запросы
+            max_workers (Optional[int]): сколько подключений открывать одновременно
+
+        Returns:
+            list[np.ndarray]: результаты в порядке запросов
+        """
+
+        return [
+            frame.to_numpy() for frame in cls.get_raw_frames_many(queries, max_workers)
+        ]
+
+    @classmethod
+    def get_raw_frames_many(
+        cls, queries: list[str | SqlQuery], max_workers: Optional[int] = None
+    ) -> list[pl.DataFrame]:
+        """
+        Выполнение независимых запросов на чтение параллельно
+
+        Каждый запрос идет своим подключением connectorx, одновременно открыто
+        не больше max_workers подключений (запрос с разбиением открывает
+        еще partition_num своих). Потоки, а не процессы - connectorx
+        читает без GIL, а воркеры celery не дают создавать дочерние процессы
+
+        Args:
+            queries (list[str | SqlQuery]): sql запросы
+            max_workers (Optional[int]): сколько подключений открывать
+                одновременно, по умолчанию CONNECTORX_MAX_CONNECTIONS из настроек,
+                1 - запросы выполняются по очереди
+
+        Returns:
+            list[pl.DataFrame]: результаты в порядке запросов
+        """
+
+        max_workers = min(
+            max_workers or settings.CONNECTORX_MAX_CONNECTIONS, len(queries)
+        )
+        if max_workers <= 1:
+            return [cls.get_raw_frame(query) for query in queries]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(cls.get_raw_frame, queries))
+
+    @classmethod
+    def get_raw_frame(cls, query: str | SqlQuery) -> pl.DataFrame:
+        """
+        Метод отдающий polars датафрейм через connectorx, без приведения типов
+
+        Args:
+            query (str | SqlQuery): sql запрос, либо запрос с настройками разбиения
+
+        Returns:
+            pl.DataFrame: результат запроса
+        """
+
+        if isinstance(query, str):
+            query = SqlQuery(query)
+
         url = cls.__create_db_url()
 
         return cx.read_sql(
             conn=url,
+            query=query.sql,
+            return_type="polars",
+            **query.get_read_options(),
+        )
+
+    @classmethod
+    def get_polars_data(
+        cls,
+        query: str,
+        schema: dict[str, pl.DataType],
+    ) -> pl.DataFrame:
+        """
+        Метод отдающий polars датафрейм через connectorx, сразу в arrow,
+        без python-объектов на каждую строку
+
+        connectorx ходит в БД своим подключением и не видит незакоммиченные
+        изменения, поэтому внутри транзакции и не на postgres запрос идет
+        через подключение джанги
+
+        Args:
+            query (str): sql запрос
+            schema (dict[str, pl.DataType]): колонки и типы результата
+
+        Returns:
+            pl.DataFrame: результат запроса, в том числе пустой, по схеме
+        """
+
+        connection = connections["default"]
+        if connection.vendor != "postgresql" or connection.in_atomic_block:
+            with connection.cursor() as cursor:
+                cursor.execute(query)
+                return pl.DataFrame(cursor.fetchall(), schema=schema, orient="row")
+
+        return cx.read_sql(
+            conn=cls.__create_db_url(),
             query=query,
             return_type="polars",
-        ).to_numpy()
+        ).cast(schema)
@@ -19,3 +19,13 @@ class EmptyFileLoaded(APIException):
     status_code = 400
     default_detail = "В запросе отсутствует файл"
     default_code = "service_unavailable"
+
+
+class FileTooLarge(APIException):
+    """
+    Загружаемый файл больше допустимого размера
+    """
+
+    status_code = 413
+    default_detail = "Размер файла превышает допустимый"
+    default_code = "file_too_large"
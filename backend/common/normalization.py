@@ -0,0 +1,41 @@
+import polars as pl
+
+
+class NameNormalizer:
+    """
+    Приведение наименований к ключу для сопоставления со справочниками:
+    без пробелов по краям, в нижнем регистре, пробелы внутри схлопнуты в один
+    """
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        """
+        Ключ наименования
+
+        Args:
+            name (str): наименование
+
+        Returns:
+            str: ключ
+        """
+
+        return " ".join(name.split()).lower()
+
+    @staticmethod
+    def expr(column: str | pl.Expr) -> pl.Expr:
+        """
+        Ключ наименования для колонки polars, совпадает с normalize
+
+        Args:
+            column (str | pl.Expr): колонка с наименованиями
+
+        Returns:
+            pl.Expr: выражение с ключом
+        """
+
+        if isinstance(column, str):
+            column = pl.col(column)
+
+        return (
+            column.str.replace_all(r"\s+", " ").str.strip_chars(" ").str.to_lowercase()
+        )
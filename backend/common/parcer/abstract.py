@@ -5,7 +5,9 @@ from typing import Optional, Union
 import pandas as pd
 import polars as pl
 from common.enums import DictedEnum
-from common.parcer.utils import ExcelProcessor
+from common.parcer.cache import ParseCache
+from common.parcer.utils import ExcelEngine, ExcelProcessor, PolarsExcelProcessor
+from common.profiling import ProfiledMixin, profile_stage
 
 
 @dataclass
@@ -15,9 +17,22 @@ class AbstractParcerConfig:
     """
 
     START_ROW = 0
+    # движок чтения файла, если он не установлен - читаем через openpyxl
+    ENGINE = ExcelEngine.OPENPYXL.value
+    # читать каждый лист в отдельном потоке (только для движков polars)
+    PARALLEL_SHEETS = False
+    # количество потоков, None - по числу ядер
+    SHEET_WORKERS: Optional[int] = None
+    # типы колонок polars, применяются при чтении файла {колонка: тип}
+    SCHEMA: Optional[dict[str, pl.DataType]] = None
+    # кешировать результат разбора по хешу файла
+    CACHE = False
+    # версия разбора, увеличивается при изменении логики чтения файла,
+    # чтобы не использовать устаревший кеш
+    VERSION = 1
 
 
-class Parcer(metaclass=ABCMeta):
+class Parcer(ProfiledMixin, metaclass=ABCMeta):
     """
     Абстрактный класс парсера
 
@@ -29,6 +44,16 @@ class Parcer(metaclass=ABCMeta):
         NotImplementedError: _description_
     """
 
+    # этапы разбора, замеряемые в импорте (common.profiling)
+    profiled_methods = (
+        "__init__",
+        "_filter",
+        "_validate",
+        "_preprocess",
+        "create_records",
+        "get_records",
+    )
+
     @abstractmethod
     def __init__(
         self,
@@ -78,18 +103,17 @@ class Parcer(metaclass=ABCMeta):
         pass
 
     def _get_user_columns_list(
-        self, df: Union[pd.DataFrame, dict[str, pd.DataFrame]]
+        self,
+        df: Union[pd.DataFrame, pl.DataFrame, dict[str, pd.DataFrame | pl.DataFrame]],
     ) -> list[str]:
         """
         Получение списка первоначальных названий колонок
         """
 
-        # если передается pd.DataFrame
-        if isinstance(df, pd.DataFrame):
-            return df.columns.tolist()
         # если передается словарь из множества датафреймов
-        dfloc = next(iter(df.values()))
-        return dfloc.columns.tolist()
+        if isinstance(df, dict):
+            df = next(iter(df.values()))
+        return list(df.columns)
 
     def _get_user_column_names(
         self, columns: type[DictedEnum], user_columns: list[str]
@@ -102,17 +126,19 @@ class Parcer(metaclass=ABCMeta):
 
     def _rename_file_columns(
         self,
-        df: Union[pd.DataFrame, dict[str, pd.DataFrame]],
+        df: Union[pd.DataFrame, pl.DataFrame, dict[str, pd.DataFrame | pl.DataFrame]],
         enum_cols: type[DictedEnum],
-    ) -> Union[pd.DataFrame, dict[str, pd.DataFrame]]:
+    ) -> Union[pd.DataFrame, pl.DataFrame, dict[str, pd.DataFrame | pl.DataFrame]]:
         """
         Переименовывание колонок датафрейма, либо всех датафреймов
         """
-        # если передается pd.DataFrame
-        if isinstance(df, pd.DataFrame):
+        # если передается один датафрейм
+        if isinstance(df, (pd.DataFrame, pl.DataFrame)):
             return self.__rename_df_columns(df, enum_cols)
         # если передается словарь из множества датафреймов
-        if all(isinstance(value, pd.DataFrame) for value in df.values()):
+        if all(
+            isinstance(value, (pd.DataFrame, pl.DataFrame)) for value in df.values()
+        ):
             return {
                 key: self.__rename_df_columns(value, enum_cols)
                 for key, value in df.items()
@@ -121,18 +147,19 @@ class Parcer(metaclass=ABCMeta):
             raise ValueError("Значения в словаре должны быть DataFrame")
 
     def __rename_df_columns(
-        self, df: pd.DataFrame, enum_cols: type[DictedEnum]
-    ) -> pd.DataFrame:
+        self, df: pd.DataFrame | pl.DataFrame, enum_cols: type[DictedEnum]
+    ) -> pd.DataFrame | pl.DataFrame:
         """
         Переименовывание колонок
         Нужно, чтобы была возможность сохранить оригинальные названия
         """
-        return df.rename(
-            columns={
-                df.columns[idx]: value
-                for idx, value in zip(range(len(df.columns)), enum_cols.get_keys())
-            }
-        )
+        columns = {
+            df.columns[idx]: value
+            for idx, value in zip(range(len(df.columns)), enum_cols.get_keys())
+        }
+        if isinstance(df, pl.DataFrame):
+            return df.rename(columns)
+        return df.rename(columns=columns)
 
 
 class PolarsParcer(Parcer):
@@ -148,11 +175,59 @@ class PolarsParcer(Parcer):
         columns_identifier: type[DictedEnum] | None = None,
         excel_processor=ExcelProcessor,
         lazy: bool = False,
-        dtype: dict | type | None = None,
         skiprows: int = 0,
         drop_rows: list | int | None = None,
+        content_hash: Optional[str] = None,
         **kwargs,
     ) -> None:
+        df: Optional[pl.DataFrame] = None
+        cache_key: Optional[str] = None
+
+        if excel_config.CACHE:
+            # хеш мог быть посчитан еще при загрузке файла
+            cache_key = ParseCache.make_key(
+                content_hash or ParseCache.hash_file(excel_file),
+                type(self),
+                excel_config,
+                self._get_cache_key_parts(),
+            )
+            cached_frames = ParseCache.get(
+                cache_key, self._get_cached_frame_names(columns_identifier)
+            )
+            if cached_frames is not None:
+                self._restore_cached_frames(cached_frames)
+                df = cached_frames["data"]
+
+        if df is None:
+            df = self.__load_file(
+                excel_file,
+                excel_config,
+                columns_identifier,
+                excel_processor,
+                skiprows,
+                drop_rows,
+                **kwargs,
+            )
+            if cache_key is not None:
+                ParseCache.set(cache_key, self._get_cached_frames(df))
+
+        self._df = df.lazy() if lazy else df
+
+    @profile_stage
+    def __load_file(
+        self,
+        excel_file,
+        excel_config: type[AbstractParcerConfig],
+        columns_identifier: type[DictedEnum] | None,
+        excel_processor,
+        skiprows: int,
+        drop_rows: list | int | None,
+        **kwargs,
+    ) -> pl.DataFrame:
+        """
+        Чтение файла и приведение его к датафрейму поларс
+        """
+
         # может оказаться так, что изначально непонятно, сколько колонок
         # в файле, из-за динамичной структуры файла
         if columns_identifier is not None:
@@ -160,33 +235,148 @@ class PolarsParcer(Parcer):
         else:
             usecols = None
 
-        pandas_df = excel_processor.load_data(
-            excel_file=excel_file,
-            engine="openpyxl",
-            skiprows=skiprows,
-            usecols=usecols,
-            **kwargs,
-        )
+        schema = excel_config.SCHEMA
+
+        # движок задается в конфиге парсера, openpyxl остается запасным вариантом
+        if PolarsExcelProcessor.is_available(excel_config.ENGINE):
+            # при чтении колонки еще не переименованы, поэтому типы задаются по номерам
+            if schema is not None and columns_identifier is not None:
+                read_schema = {
+                    columns_identifier[name].value: dtype
+                    for name, dtype in schema.items()
+                }
+            else:
+                read_schema = schema
+
+            if excel_config.PARALLEL_SHEETS and isinstance(
+                kwargs.get("sheet_name"), list
+            ):
+                df = PolarsExcelProcessor.load_sheets_parallel(
+                    excel_file=excel_file,
+                    max_workers=excel_config.SHEET_WORKERS,
+                    engine=excel_config.ENGINE,
+                    skiprows=skiprows,
+                    usecols=usecols,
+                    schema=read_schema,
+                    **kwargs,
+                )
+            else:
+                df = PolarsExcelProcessor.load_data(
+                    excel_file=excel_file,
+                    engine=excel_config.ENGINE,
+                    skiprows=skiprows,
+                    usecols=usecols,
+                    schema=read_schema,
+                    **kwargs,
+                )
+        else:
+            df = excel_processor.load_data(
+                excel_file=excel_file,
+                engine=ExcelEngine.OPENPYXL.value,
+                skiprows=skiprows,
+                usecols=usecols,
+                **kwargs,
+            )
 
         if drop_rows is not None:
-            pandas_df = pandas_df.drop(index=drop_rows)
+            df = self._drop_rows(df, drop_rows)
 
         if columns_identifier:
             self.user_column_names = self._get_user_column_names(
-                columns_identifier, self._get_user_columns_list(pandas_df)
+                columns_identifier, self._get_user_columns_list(df)
             )
-            pandas_df = self._rename_file_columns(pandas_df, columns_identifier)
-        pandas_df = self._perform_data(pandas_df, dtype)
-
-        self._df = pl.LazyFrame(pandas_df) if lazy else pl.from_pandas(pandas_df)
+            df = self._rename_file_columns(df, columns_identifier)
+        return self._perform_data(df, schema)
 
-    def _perform_data(cls, df: pd.DataFrame, dtype: dict | type | None) -> pd.DataFrame:
+    def _perform_data(
+        cls,
+        df: pd.DataFrame | pl.DataFrame,
+        schema: dict[str, pl.DataType] | None,
+    ) -> pl.DataFrame:
         """
-        Обрабатывает датафрейм пандас, подготавливая его к конвертации в датафрейм поларс
+        Обрабатывает датафрейм, приводя его к датафрейму поларс со схемой из конфига
         """
 
-        # Этот костыль нужен, потому что поларс, считывая пандас, может криво расставить типы в колонках
-        if dtype is not None:
-            df = df.astype(dtype)
+        if isinstance(df, pd.DataFrame):
+            # openpyxl оставляет в колонке вперемешку числа и строки,
+            # поэтому числа приводятся через coerce, а пропуски становятся null
+            if schema is not None:
+                df = df.assign(
+                    **{
+                        name: pd.to_numeric(df[name], errors="coerce")
+                        if dtype.is_numeric()
+                        else df[name].astype("string")
+                        for name, dtype in schema.items()
+                        if dtype.is_numeric() or dtype == pl.String
+                    }
+                )
+            df = pl.from_pandas(df)
+
+        if schema is not None:
+            df = df.cast(schema)
 
         return df
+
+    def _get_cache_key_parts(self) -> list[str]:
+        """
+        Части ключа кеша разбора помимо файла, парсера и конфига: то, от чего
+        результат разбора зависит, кроме содержимого файла
+        """
+
+        return []
+
+    def _get_cached_frame_names(
+        self, columns_identifier: type[DictedEnum] | None
+    ) -> list[str]:
+        """
+        Имена датафреймов, которые должны быть в записи кеша разбора,
+        совпадают с ключами _get_cached_frames
+        """
+
+        names = ["data"]
+        # наименования колонок пользователя сохраняются при чтении по идентификатору
+        if columns_identifier is not None:
+            names.append("user_columns")
+        return names
+
+    def _get_cached_frames(self, df: pl.DataFrame) -> dict[str, pl.DataFrame]:
+        """
+        Датафреймы для сохранения в кеш разбора
+        """
+
+        frames = {"data": df}
+        if hasattr(self, "user_column_names"):
+            frames["user_columns"] = pl.DataFrame(
+                {
+                    "number": list(self.user_column_names.keys()),
+                    "name": list(self.user_column_names.values()),
+                },
+                schema={"number": pl.Int64, "name": pl.String},
+            )
+        return frames
+
+    def _restore_cached_frames(self, frames: dict[str, pl.DataFrame]) -> None:
+        """
+        Восстановление состояния парсера из кеша разбора
+        """
+
+        if "user_columns" in frames:
+            self.user_column_names = dict(frames["user_columns"].iter_rows())
+
+    @staticmethod
+    def _drop_rows(
+        df: pd.DataFrame | pl.DataFrame, drop_rows: list | int
+    ) -> pd.DataFrame | pl.DataFrame:
+        """
+        Удаление строк по их номерам
+        """
+
+        if isinstance(df, pd.DataFrame):
+            return df.drop(index=drop_rows)
+
+        drop_rows = drop_rows if isinstance(drop_rows, list) else [drop_rows]
+        return (
+            df.with_row_index("__row_index")
+            .filter(~pl.col("__row_index").is_in(drop_rows))
+            .drop("__row_index")
+        )
@@ -0,0 +1,186 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from pathlib import Path
+from typing import Optional
+
+import polars as pl
+from django.conf import settings
+
+
+class ParseCache:
+    """
+    Кеш результатов разбора файлов
+
+    Ключ - sha256 содержимого файла, класс парсера и версия его конфига.
+    Каждый результат хранится в своей папке набором Arrow IPC файлов,
+    при превышении лимита размера удаляются давно не использованные записи
+    """
+
+    @staticmethod
+    def hash_file(excel_file: str | bytes | BytesIO) -> str:
+        """
+        Хеш содержимого файла
+
+        Args:
+            excel_file (str | bytes | BytesIO): путь до файла, либо сам файл
+
+        Returns:
+            str: sha256 в hex
+        """
+
+        if isinstance(excel_file, bytes):
+            return hashlib.sha256(excel_file).hexdigest()
+
+        if isinstance(excel_file, (str, Path)):
+            with open(excel_file, "rb") as file:
+                return hashlib.file_digest(file, "sha256").hexdigest()
+
+        excel_file.seek(0)
+        digest = hashlib.file_digest(excel_file, "sha256").hexdigest()
+        excel_file.seek(0)
+        return digest
+
+    @staticmethod
+    def make_key(
+        content_hash: str, parser: type, config: type, parts: Optional[list[str]] = None
+    ) -> str:
+        """
+        Ключ записи в кеше
+
+        Args:
+            content_hash (str): хеш содержимого файла
+            parser (type): класс парсера
+            config (type): конфиг парсера
+            parts (Optional[list[str]]): прочее, от чего зависит результат разбора
+
+        Returns:
+            str: ключ
+        """
+
+        raw_key = ":".join(
+            [
+                content_hash,
+                f"{parser.__module__}.{parser.__qualname__}",
+                f"{config.__module__}.{config.__qualname__}",
+                str(config.VERSION),
+                *(parts or []),
+            ]
+        )
+        return hashlib.sha256(raw_key.encode()).hexdigest()
+
+    @classmethod
+    def get(cls, key: str, names: list[str]) -> Optional[dict[str, pl.DataFrame]]:
+        """
+        Получение результата разбора из кеша
+
+        Запись без любого из датафреймов, в том числе удаляемая параллельно
+        при вытеснении, считается промахом и удаляется, чтобы set записал ее заново
+
+        Args:
+            key (str): ключ
+            names (list[str]): имена датафреймов, которые должны быть в записи
+
+        Returns:
+            Optional[dict[str, pl.DataFrame]]: датафреймы по именам, либо None
+        """
+
+        path = cls.__get_cache_dir() / key
+        try:
+            frames = {
+                name: pl.read_ipc(path / f"{name}.arrow", memory_map=False)
+                for name in names
+            }
+            # отметка использования для вытеснения
+            os.utime(path)
+        except (OSError, pl.exceptions.PolarsError):
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+
+        return frames
+
+    @classmethod
+    def set(cls, key: str, frames: dict[str, pl.DataFrame]) -> None:
+        """
+        Сохранение результата разбора в кеш
+
+        Args:
+            key (str): ключ
+            frames (dict[str, pl.DataFrame]): датафреймы по именам
+        """
+
+        cache_dir = cls.__get_cache_dir()
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+        # пишем во временную папку и переименовываем, чтобы параллельные
+        # импорты не прочитали недописанную запись
+        path = cache_dir / key
+        tmp_dir = Path(tempfile.mkdtemp(dir=cache_dir, prefix=".tmp-"))
+        try:
+            for name, frame in frames.items():
+                frame.write_ipc(tmp_dir / f"{name}.arrow", compression="lz4")
+            try:
+                os.replace(tmp_dir, path)
+            except OSError:
+                # полную запись положил параллельный импорт, неполную
+                # (устаревшую или недоудаленную) заменяем
+                if cls.__is_complete(path, list(frames)):
+                    raise
+                shutil.rmtree(path, ignore_errors=True)
+                os.replace(tmp_dir, path)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+
+        cls.__evict(cache_dir)
+
+    @staticmethod
+    def __is_complete(path: Path, names: list[str]) -> bool:
+        """
+        Есть ли в записи все датафреймы
+
+        Args:
+            path (Path): папка записи
+            names (list[str]): имена датафреймов
+
+        Returns:
+            bool: запись полная
+        """
+
+        return all((path / f"{name}.arrow").is_file() for name in names)
+
+    @staticmethod
+    def __evict(cache_dir: Path) -> None:
+        """
+        Удаление давно не использованных записей сверх лимита размера
+
+        Args:
+            cache_dir (Path): папка кеша
+        """
+
+        entries = []
+        for entry in cache_dir.iterdir():
+            if entry.name.startswith(".tmp-"):
+                continue
+            try:
+                size = sum(file.stat().st_size for file in entry.iterdir())
+                entries.append((entry.stat().st_mtime, size, entry))
+            except FileNotFoundError:
+                continue
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total_size <= settings.PARSE_CACHE_MAX_SIZE:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total_size -= size
+
+    @staticmethod
+    def __get_cache_dir() -> Path:
+        """
+        Папка кеша из настроек
+        """
+
+        return Path(settings.PARSE_CACHE_DIR)
@@ -1,9 +1,23 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
 from io import BytesIO
 
 import pandas as pd
+import polars as pl
+from common.enums import DictedEnum
 from rest_framework.exceptions import APIException
 
 
+class ExcelEngine(DictedEnum):
+    """
+    Движки чтения экселек
+    """
+
+    OPENPYXL = "openpyxl"
+    CALAMINE = "calamine"
+
+
 class ExcelProcessor:
     """
     Дефолтный класс для обработки экселек
@@ -21,3 +35,132 @@ class ExcelProcessor:
             raise APIException(
                 f"В форме отсутствует лист {kwargs['sheet_name']}"
             ) from exc
+
+
+class PolarsExcelProcessor:
+    """
+    Класс для обработки экселек нативными движками polars, минуя pandas
+    """
+
+    # модули, без которых движок не заработает
+    engine_modules: dict[str, str] = {
+        ExcelEngine.CALAMINE.value: "fastexcel",
+    }
+    # соответствие типов polars типам, которые понимает calamine при чтении
+    engine_dtypes: dict[type[pl.DataType], str] = {
+        pl.String: "string",
+        pl.Float64: "float",
+        pl.Int64: "int",
+        pl.Boolean: "boolean",
+        pl.Date: "date",
+        pl.Datetime: "datetime",
+        pl.Duration: "duration",
+    }
+
+    @classmethod
+    def is_available(cls, engine: str) -> bool:
+        """
+        Проверка, что движок поддерживается и установлен
+
+        Args:
+            engine (str): наименование движка
+
+        Returns:
+            bool: можно ли читать файл этим движком
+        """
+
+        module = cls.engine_modules.get(engine)
+        return module is not None and find_spec(module) is not None
+
+    @classmethod
+    def load_data(
+        cls,
+        excel_file: BytesIO,
+        engine: str = ExcelEngine.CALAMINE.value,
+        skiprows: int = 0,
+        usecols: list[int] | None = None,
+        sheet_name: str | list[str] | None = None,
+        schema: dict[int | str, pl.DataType] | None = None,
+        **kwargs,
+    ) -> pl.DataFrame | dict[str, pl.DataFrame]:
+        """
+        Загрузка данных сразу в polars
+
+        Args:
+            excel_file (BytesIO): файл
+            engine (str): движок чтения
+            skiprows (int): сколько строк пропустить до шапки
+            usecols (list[int] | None): номера колонок
+            sheet_name (str | list[str] | None): лист или список листов
+            schema (dict[int | str, pl.DataType] | None): типы колонок по номеру или имени,
+                значения, не подходящие под тип, читаются как null
+
+        Returns:
+            pl.DataFrame | dict[str, pl.DataFrame]: датафрейм, либо словарь датафреймов по листам
+        """
+
+        if isinstance(excel_file, bytes):
+            excel_file = BytesIO(excel_file)
+
+        read_options = {"header_row": skiprows}
+        if schema is not None:
+            read_options["dtypes"] = {
+                column: cls.engine_dtypes[dtype.base_type()]
+                for column, dtype in schema.items()
+            }
+            read_options["dtype_coercion"] = "coerce"
+
+        try:
+            return pl.read_excel(
+                excel_file,
+                sheet_name=sheet_name,
+                engine=engine,
+                columns=usecols,
+                read_options=read_options,
+                # как и в pandas, пустые строки внутри таблицы не выкидываем
+                drop_empty_rows=False,
+                **kwargs,
+            )
+        except ValueError as exc:
+            # Нет листа
+            raise APIException(f"В форме отсутствует лист {sheet_name}") from exc
+
+    @classmethod
+    def load_sheets_parallel(
+        cls,
+        excel_file: str | os.PathLike | bytes | BytesIO,
+        sheet_name: list[str],
+        max_workers: int | None = None,
+        **kwargs,
+    ) -> dict[str, pl.DataFrame]:
+        """
+        Загрузка листов, каждый лист разбирается в отдельном потоке
+
+        Потоки, а не процессы - воркеры celery не дают создавать дочерние процессы,
+        а calamine разбирает лист без GIL
+
+        Args:
+            excel_file (str | os.PathLike | bytes | BytesIO): путь до файла, либо файл
+            sheet_name (list[str]): список листов
+            max_workers (int | None): количество потоков, по умолчанию по числу ядер
+
+        Returns:
+            dict[str, pl.DataFrame]: словарь датафреймов по листам
+        """
+
+        # файл (путь до спула или открытый файл) читается в память один раз,
+        # потокам передаются общие bytes: load_data оборачивает их в свой BytesIO
+        # без копирования, и потоки не читают книгу с диска каждый заново
+        if isinstance(excel_file, (str, os.PathLike)):
+            with open(excel_file, "rb") as file:
+                excel_file = file.read()
+        elif hasattr(excel_file, "read"):
+            excel_file.seek(0)
+            excel_file = excel_file.read()
+
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            frames = executor.map(
+                lambda sheet: cls.load_data(excel_file, sheet_name=sheet, **kwargs),
+                sheet_name,
+            )
+            return dict(zip(sheet_name, frames))
@@ -0,0 +1,232 @@
+import json
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field, fields, is_dataclass
+from functools import wraps
+from typing import Any, Callable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+import polars as pl
+
+try:
+    import resource
+except ImportError:
+    # на windows модуля нет, пиковая память не снимается
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# профайлер текущей задачи, вне задачи этапы не замеряются
+_current_profiler: ContextVar[Optional["ImportProfiler"]] = ContextVar(
+    "import_profiler", default=None
+)
+
+
+@dataclass
+class StageMetrics:
+    """
+    Замеры одного этапа импорта
+
+    Attributes:
+        name (str): этап, Класс.метод
+        parent (Optional[str]): этап, внутри которого выполнялся данный
+        wall_time (float): время выполнения, сек
+        cpu_time (float): процессорное время всех потоков процесса, сек
+        rss_delta (int): прирост пиковой памяти процесса за этап, байт
+        rows_in (Optional[int]): строк на входе
+        rows_out (Optional[int]): строк на выходе
+    """
+
+    name: str
+    parent: Optional[str] = None
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    rss_delta: int = 0
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+
+
+@dataclass
+class ImportProfiler:
+    """
+    Сбор замеров по этапам импорта
+
+    Замер - пара вызовов perf_counter, process_time и getrusage на этап,
+    поэтому профайлер можно держать включенным на проде
+
+    Attributes:
+        task_id (Optional[str]): ID задачи celery
+        stages (list[StageMetrics]): замеры в порядке завершения этапов
+    """
+
+    task_id: Optional[str] = None
+    stages: list[StageMetrics] = field(default_factory=list)
+    _stack: list[str] = field(default_factory=list, repr=False)
+
+    def __enter__(self) -> "ImportProfiler":
+        self._token = _current_profiler.set(self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        _current_profiler.reset(self._token)
+        self.log()
+
+    @contextmanager
+    def stage(self, name: str, rows_in: Optional[int] = None) -> Iterator[StageMetrics]:
+        """
+        Замер этапа импорта
+
+        Args:
+            name (str): этап
+            rows_in (Optional[int]): строк на входе
+
+        Yields:
+            StageMetrics: замер, rows_out заполняется внутри блока
+        """
+
+        stage = StageMetrics(
+            name=name,
+            parent=self._stack[-1] if self._stack else None,
+            rows_in=rows_in,
+        )
+        self._stack.append(name)
+        rss_start = get_peak_rss()
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage.wall_time = round(time.perf_counter() - wall_start, 4)
+            stage.cpu_time = round(time.process_time() - cpu_start, 4)
+            stage.rss_delta = get_peak_rss() - rss_start
+            self._stack.pop()
+            self.stages.append(stage)
+
+    def as_list(self) -> list[dict]:
+        """
+        Замеры для ответа задачи celery
+
+        Returns:
+            list[dict]: замеры по этапам
+        """
+
+        return [asdict(stage) for stage in self.stages]
+
+    def log(self) -> None:
+        """
+        Запись замеров в лог одной строкой json
+        """
+
+        logger.info(
+            json.dumps(
+                {
+                    "event": "import_profile",
+                    "task_id": self.task_id,
+                    "stages": self.as_list(),
+                },
+                ensure_ascii=False,
+            )
+        )
+
+
+def count_rows(value: Any) -> Optional[int]:
+    """
+    Количество строк в данных этапа
+
+    Ленивые фреймы не считаются - это потребовало бы лишнего collect
+
+    Args:
+        value (Any): датафрейм, список, либо кортеж/словарь/dataclass датафреймов
+
+    Returns:
+        Optional[int]: количество строк, если его можно узнать без вычислений
+    """
+
+    if isinstance(value, (pl.DataFrame, pd.DataFrame, np.ndarray)):
+        return len(value)
+    # список колонок - не данные
+    if isinstance(value, list) and not (value and isinstance(value[0], str)):
+        return len(value)
+    if isinstance(value, dict) and value:
+        counts = [count_rows(item) for item in value.values()]
+    elif isinstance(value, tuple) and value:
+        counts = [count_rows(item) for item in value]
+    elif is_dataclass(value) and not isinstance(value, type):
+        # например DeltaInstances - сумма по всем его датафреймам и спискам
+        counts = [count_rows(getattr(value, item.name)) for item in fields(value)]
+    else:
+        return None
+    return None if None in counts else sum(counts)
+
+
+def get_peak_rss() -> int:
+    """
+    Пиковая память процесса, байт
+    """
+
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux отдает килобайты, macos - байты
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def profile_stage(func: Callable) -> Callable:
+    """
+    Замер метода как этапа импорта, если в контексте есть профайлер
+
+    Args:
+        func (Callable): метод
+
+    Returns:
+        Callable: обернутый метод
+    """
+
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        profiler = _current_profiler.get()
+        if profiler is None:
+            return func(self, *args, **kwargs)
+
+        # метод базового класса подписывается и классом объекта, и владельцем:
+        # IndicatorLoader(HandbookCreator).upsert_instances
+        owner = func.__qualname__.rsplit(".", 1)[0]
+        name = type(self).__name__
+        if owner != name:
+            name = f"{name}({owner})"
+        name = f"{name}.{func.__name__}"
+
+        rows_in = next((n for n in map(count_rows, args) if n is not None), None)
+        with profiler.stage(name, rows_in) as stage:
+            result = func(self, *args, **kwargs)
+            # у __init__ результата нет, строки берутся из разобранного файла
+            if func.__name__ == "__init__":
+                stage.rows_in = None
+                stage.rows_out = count_rows(getattr(self, "_df", None))
+            else:
+                stage.rows_out = count_rows(result)
+        return result
+
+    return wrapper
+
+
+class ProfiledMixin:
+    """
+    Замер этапов у наследников
+
+    Методы из profiled_methods, объявленные в самом классе, оборачиваются
+    profile_stage, переопределения в наследниках замеряются так же
+    """
+
+    profiled_methods: tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        for name in cls.profiled_methods:
+            method = cls.__dict__.get(name)
+            if callable(method) and not hasattr(method, "__wrapped__"):
+                setattr(cls, name, profile_stage(method))
@@ -0,0 +1,42 @@
+import polars as pl
+
+
+class HandbookResolver:
+    """
+    Сопоставление наименований со справочником через pl.Enum
+
+    Категории Enum - наименования справочника в его порядке, поэтому физический
+    код наименования совпадает с позицией его id. Наименования переводятся в id
+    выборкой по коду, без join по строкам. Наименования, которых нет
+    в справочнике, получают id null
+    """
+
+    def __init__(
+        self,
+        handbook: pl.DataFrame,
+        id_column: str = "id",
+        name_column: str = "name",
+    ) -> None:
+        handbook = handbook.filter(pl.col(name_column).is_not_null()).unique(
+            subset=name_column, keep="first", maintain_order=True
+        )
+        self.dtype = pl.Enum(handbook[name_column])
+        self.ids = handbook[id_column]
+
+    def resolve(self, column: str | pl.Expr) -> pl.Expr:
+        """
+        id справочника для колонки с наименованиями
+
+        Args:
+            column (str | pl.Expr): колонка с наименованиями
+
+        Returns:
+            pl.Expr: выражение с id, null для отсутствующих в справочнике
+        """
+
+        if isinstance(column, str):
+            column = pl.col(column)
+
+        return pl.lit(self.ids).gather(
+            column.cast(self.dtype, strict=False).to_physical()
+        )
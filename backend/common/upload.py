@@ -0,0 +1,167 @@
+import hashlib
+import os
+import uuid
+from pathlib import Path
+
+from common.exaptions import FileTooLarge
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+
+
+class SpoolUploadedFile(UploadedFile):
+    """
+    Файл, записанный при загрузке в папку спула
+
+    Attributes:
+        path (str): путь до файла в спуле
+        content_hash (str): sha256 содержимого
+    """
+
+    def __init__(self, path: str, content_hash: str, **kwargs) -> None:
+        # файл открывается только по требованию: обычно до воркера celery
+        # доходит путь, и дескриптор в процессе веба не нужен
+        super().__init__(None, **kwargs)
+        self.path = path
+        self.content_hash = content_hash
+
+    def temporary_file_path(self) -> str:
+        return self.path
+
+    def open(self, mode: str = "rb") -> "SpoolUploadedFile":
+        if self.closed:
+            self.file = open(self.path, mode)
+        else:
+            self.file.seek(0)
+        return self
+
+    def close(self) -> None:
+        if not self.closed:
+            self.file.close()
+
+
+class SpoolFileUploadHandler(FileUploadHandler):
+    """
+    Обработчик загрузки, пишущий файл частями сразу в папку спула
+
+    Файл не держится в памяти целиком, размер проверяется по ходу записи,
+    хеш содержимого считается по тем же частям
+    """
+
+    def __init__(self, request=None) -> None:
+        super().__init__(request)
+        self.file = None
+        self.path: str | None = None
+        self.hash = None
+        self.size = 0
+        # пути всех записанных в спул файлов запроса
+        self.spooled_paths: list[str] = []
+
+    def new_file(self, *args, **kwargs) -> None:
+        super().new_file(*args, **kwargs)
+
+        if self.content_length and self.content_length > settings.UPLOAD_MAX_SIZE:
+            raise FileTooLarge
+
+        # путь абсолютный - по нему файл читает воркер celery
+        spool_dir = Path(settings.UPLOAD_SPOOL_DIR).resolve()
+        spool_dir.mkdir(parents=True, exist_ok=True)
+        # имя в спуле уникальное, исходное имя остается в self.file_name
+        self.path = str(spool_dir / f"{uuid.uuid4().hex}{Path(self.file_name).suffix}")
+        self.file = open(self.path, "wb")
+        self.hash = hashlib.sha256()
+        self.size = 0
+
+    def receive_data_chunk(self, raw_data: bytes, start: int) -> None:
+        self.size += len(raw_data)
+        if self.size > settings.UPLOAD_MAX_SIZE:
+            self.__remove_file()
+            raise FileTooLarge
+
+        self.hash.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size: int) -> SpoolUploadedFile:
+        self.file.close()
+        self.file = None
+        self.spooled_paths.append(self.path)
+
+        return SpoolUploadedFile(
+            self.path,
+            self.hash.hexdigest(),
+            name=self.file_name,
+            content_type=self.content_type,
+            size=file_size,
+            charset=self.charset,
+            content_type_extra=self.content_type_extra,
+        )
+
+    def upload_interrupted(self) -> None:
+        self.__remove_file()
+
+    def __remove_file(self) -> None:
+        """
+        Удаление недописанного файла
+        """
+
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class SpoolUploadMixin:
+    """
+    Загрузка файлов запроса через SpoolFileUploadHandler
+
+    Файл пишется в спул еще при разборе запроса, до сериализатора. Все файлы,
+    не переданные задаче через keep_spool_file (ошибка валидации, сбой
+    постановки задачи и т.п.), удаляются по завершении запроса
+    """
+
+    def initialize_request(self, request, *args, **kwargs):
+        self.spool_handler = SpoolFileUploadHandler(request)
+        self.kept_spool_paths: set[str] = set()
+        request.upload_handlers = [self.spool_handler]
+        return super().initialize_request(request, *args, **kwargs)
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            self.__remove_unkept_files()
+
+    def keep_spool_file(self, file_loaded: SpoolUploadedFile) -> None:
+        """
+        Отметка, что файл передан задаче и удаляется ею
+
+        Args:
+            file_loaded (SpoolUploadedFile): файл
+        """
+
+        self.kept_spool_paths.add(file_loaded.path)
+
+    def __remove_unkept_files(self) -> None:
+        """
+        Удаление файлов спула, не переданных задаче
+        """
+
+        handler = getattr(self, "spool_handler", None)
+        if handler is None:
+            return
+
+        for path in handler.spooled_paths:
+            if path not in self.kept_spool_paths:
+                remove_spool_file(path)
+
+
+def remove_spool_file(path: str) -> None:
+    """
+    Удаление файла из спула, уже удаленный файл не ошибка
+
+    Args:
+        path (str): путь до файла
+    """
+
+    Path(path).unlink(missing_ok=True)
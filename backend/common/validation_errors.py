@@ -1,6 +1,10 @@
-from dataclasses import dataclass, field
+import os
+from dataclasses import dataclass, field, fields
 from typing import Optional
 
+import polars as pl
+from django.conf import settings
+
 
 @dataclass
 class DataForResponse:
@@ -11,6 +15,13 @@ class DataForResponse:
     text: Optional[str] = None
     log_errors: Optional[list] = field(default_factory=list)
     warning: bool = False
+    # сколько строк добавлено, изменено и удалено при загрузке
+    statistic: Optional[dict] = None
+    # всего ошибок и файл с полным перечнем, в log_errors только первые из них
+    errors_count: Optional[int] = None
+    log_file: Optional[str] = None
+    # замеры этапов импорта: время, память, количество строк
+    profile: Optional[list] = None
 
 
 @dataclass
@@ -23,3 +34,75 @@ class PresentationDataForError:
     type: Optional[str] = None
     column: Optional[str] = None
     name_object: Optional[str] = None
+    # сколько раз ошибка встречается в файле
+    count: Optional[int] = None
+
+
+class ErrorReport:
+    """
+    Отчет об ошибках загрузки
+
+    Отчет - датафрейм с колонками PresentationDataForError. В ответ задачи
+    попадают только самые частые ошибки, полный отчет пишется в файл
+    """
+
+    schema: dict[str, pl.DataType] = {
+        "text": pl.String,
+        "type": pl.String,
+        "column": pl.String,
+        "name_object": pl.String,
+        "count": pl.UInt32,
+    }
+
+    @classmethod
+    def empty(cls) -> pl.DataFrame:
+        """
+        Пустой отчет
+        """
+
+        return pl.DataFrame(schema=cls.schema)
+
+    @classmethod
+    def get_top(cls, report: pl.DataFrame, top_n: int = None) -> list[dict]:
+        """
+        Самые частые ошибки
+
+        Args:
+            report (pl.DataFrame): отчет
+            top_n (int): сколько ошибок вернуть, по умолчанию из настроек
+
+        Returns:
+            list[dict]: ошибки в формате PresentationDataForError
+        """
+
+        if top_n is None:
+            top_n = settings.IMPORT_ERRORS_TOP_N
+
+        return (
+            report.sort(["count", "column", "text"], descending=[True, False, False])
+            .head(top_n)
+            .select(field.name for field in fields(PresentationDataForError))
+            .to_dicts()
+        )
+
+    @classmethod
+    def save(cls, report: pl.DataFrame, name: str) -> str:
+        """
+        Запись полного отчета в файл
+
+        Args:
+            report (pl.DataFrame): отчет
+            name (str): имя файла без расширения, например id задачи
+
+        Returns:
+            str: имя файла в папке files
+        """
+
+        filename = f"{name}_errors.csv"
+        os.makedirs("files", exist_ok=True)
+        # BOM, чтобы эксель открыл кириллицу без настройки кодировки
+        report.sort(["column", "text"]).write_csv(
+            f"files/{filename}", include_bom=True, separator=";"
+        )
+
+        return filename
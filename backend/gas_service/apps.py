@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class GasServiceConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "gas_service"
+
+    def ready(self):
+        from gas_service import checks, signals  # noqa: F401
@@ -0,0 +1,253 @@
+import shutil
+import tempfile
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from random import Random
+
+from common.benchmark import Benchmark, BenchmarkResult
+from django.db import transaction
+from django.test.utils import override_settings
+from gas_service.loaders.handbook import (
+    IndicatorLoader,
+    InstallationLoader,
+    TypePlanLoader,
+)
+from gas_service.parsers.config import ProductionProductExcelConfig
+from gas_service.parsers.handbook import HandbookParcer
+from gas_service.parsers.production_product import ProductionProductParcer
+from openpyxl import Workbook
+
+
+@dataclass
+class SyntheticWorkbook:
+    """
+    Генератор файлов "Выработка продукции" и справочников в формате реальных форм
+
+    Лист "Выработки продукции" повторяет выгрузку: дата в A1, заголовок в C4,
+    шапка с "Типами плана" в строке START_ROW + 1, дальше блоки установок -
+    строка с наименованием установки и строки показателей с кодом, единицей
+    измерения и пятью значениями
+
+    Attributes:
+        rows_per_sheet (int): строк показателей на каждом из 12 листов
+        installations (int): количество установок на листе
+        seed (int): зерно генератора значений
+    """
+
+    rows_per_sheet: int
+    installations: int = 50
+    seed: int = 0
+    types_plan: list[str] = field(
+        default_factory=lambda: [
+            "ПП М03",
+            "Сетевой график (СГ)",
+            "ФАКТ",
+            "Δ ФАКТ-ПП М03",
+            "Δ ФАКТ-СГ",
+        ]
+    )
+
+    @property
+    def indicators_per_installation(self) -> int:
+        return max(self.rows_per_sheet // self.installations, 1)
+
+    def get_indicators(self) -> list[str]:
+        return [
+            f"Показатель {number}, тыс.м3"
+            for number in range(self.indicators_per_installation)
+        ]
+
+    def get_installations(self) -> list[str]:
+        return [f"Установка {number}" for number in range(self.installations)]
+
+    def write_production_product(self, path: Path) -> Path:
+        """
+        Запись файла "Выработка продукции"
+
+        Args:
+            path (Path): путь до файла
+
+        Returns:
+            Path: путь до файла
+        """
+
+        random = Random(self.seed)
+        indicators = self.get_indicators()
+        installations = self.get_installations()
+
+        workbook = Workbook(write_only=True)
+        for month in range(1, 13):
+            worksheet = workbook.create_sheet(str(month).zfill(2))
+            worksheet.append([datetime(datetime.now().year, month, 1)])
+            for _ in range(ProductionProductExcelConfig.START_ROW - 2):
+                worksheet.append([])
+            worksheet.append([None, None, "Справка по выработке продукции"])
+            worksheet.append([None, None, None, *self.types_plan])
+
+            for installation in installations:
+                worksheet.append([None, None, installation])
+                for number, indicator in enumerate(indicators):
+                    plan = round(random.uniform(0, 100_000), 3)
+                    graph = round(random.uniform(0, 100_000), 3)
+                    fact = round(random.uniform(0, 100_000), 3)
+                    # разницы пишутся значениями: у формул openpyxl не сохраняет
+                    # результат, и calamine прочитал бы их как пустые ячейки
+                    worksheet.append(
+                        [
+                            f"{number}.{month}.",
+                            "т",
+                            indicator,
+                            plan,
+                            graph,
+                            fact,
+                            round(fact - plan, 3),
+                            round(fact - graph, 3),
+                        ]
+                    )
+
+        workbook.save(path)
+        return path
+
+    def write_handbook(self, path: Path) -> Path:
+        """
+        Запись файла справочников
+
+        Args:
+            path (Path): путь до файла
+
+        Returns:
+            Path: путь до файла
+        """
+
+        columns = [self.get_indicators(), self.get_installations(), self.types_plan]
+
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet("handbook")
+        worksheet.append(["Показатель", "Установка", "Тип плана"])
+        for row in range(max(len(column) for column in columns)):
+            worksheet.append(
+                [column[row] if row < len(column) else None for column in columns]
+            )
+
+        workbook.save(path)
+        return path
+
+
+class ImportBenchmark(Benchmark):
+    """
+    Замер этапов импорта "Выработки продукции" и справочников на синтетических файлах
+
+    Справочники из сгенерированного файла пишутся в БД внутри транзакции,
+    которая откатывается после замера, поэтому валидация идет мимо кеша
+    справочников - как при первом импорте после их изменения
+    """
+
+    def __init__(self, workdir: Path, repeat: int = 3, installations: int = 50):
+        super().__init__(repeat)
+        self.workdir = workdir
+        self.installations = installations
+
+    def run(self, scales: list[int]) -> list[BenchmarkResult]:
+        """
+        Замер всех этапов для каждого масштаба
+
+        Args:
+            scales (list[int]): строк показателей на лист
+
+        Returns:
+            list[BenchmarkResult]: замеры
+        """
+
+        for rows_per_sheet in scales:
+            production_product, handbook = self.__get_files(rows_per_sheet)
+            with transaction.atomic():
+                self.__run_scale(rows_per_sheet, production_product, handbook)
+                transaction.set_rollback(True)
+
+        return self.results
+
+    def __run_scale(
+        self, rows_per_sheet: int, production_product: Path, handbook: Path
+    ) -> None:
+        """
+        Замер этапов на файлах одного масштаба
+        """
+
+        cache_dir = Path(tempfile.mkdtemp(dir=self.workdir, prefix="parse_cache-"))
+        try:
+            with override_settings(PARSE_CACHE_DIR=str(cache_dir)):
+                records = self._measure(
+                    "HandbookParcer",
+                    rows_per_sheet,
+                    lambda _: HandbookParcer(handbook, None).get_records(),
+                    setup=lambda: self.__clear_dir(cache_dir),
+                )
+                indicators, installations, types_plan = records
+                IndicatorLoader().upsert_instances(indicators)
+                InstallationLoader().upsert_instances(installations)
+                TypePlanLoader().upsert_instances(types_plan)
+
+                self._measure(
+                    "ProductionProductParcer.__init__",
+                    rows_per_sheet,
+                    lambda _: ProductionProductParcer(production_product, None),
+                    setup=lambda: self.__clear_dir(cache_dir),
+                )
+                self._measure(
+                    "ProductionProductParcer.__init__ (parse cache)",
+                    rows_per_sheet,
+                    lambda: ProductionProductParcer(production_product, None),
+                )
+                # разбор из кеша, чтобы замерять только сам этап
+                self._measure(
+                    "ProductionProductParcer._validate",
+                    rows_per_sheet,
+                    lambda parser: parser._validate(),
+                    setup=lambda: ProductionProductParcer(production_product, None),
+                )
+                self._measure(
+                    "ProductionProductParcer.create_records",
+                    rows_per_sheet,
+                    lambda parser: parser.create_records(),
+                    setup=lambda: self.__get_validated_parser(production_product),
+                )
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    @staticmethod
+    def __clear_dir(path: Path) -> None:
+        """
+        Очистка кеша разбора перед повтором
+        """
+
+        for entry in path.iterdir():
+            shutil.rmtree(entry, ignore_errors=True)
+
+    @staticmethod
+    def __get_validated_parser(path: Path) -> ProductionProductParcer:
+        """
+        Парсер после валидации - create_records берет из нее справочники
+        """
+
+        parser = ProductionProductParcer(path, None)
+        parser._validate()
+        return parser
+
+    def __get_files(self, rows_per_sheet: int) -> tuple[Path, Path]:
+        """
+        Сгенерированные файлы масштаба, уже созданные берутся из рабочей папки
+        """
+
+        generator = SyntheticWorkbook(rows_per_sheet, self.installations)
+        name = f"{rows_per_sheet}x{self.installations}"
+
+        production_product = self.workdir / f"production_product_{name}.xlsx"
+        if not production_product.exists():
+            generator.write_production_product(production_product)
+
+        handbook = self.workdir / f"handbook_{name}.xlsx"
+        if not handbook.exists():
+            generator.write_handbook(handbook)
+
+        return production_product, handbook
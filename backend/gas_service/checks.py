@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+from gas_service.queries import HandbookLoader
+
+
+@register()
+def check_handbook_cache(app_configs, **kwargs) -> list[Warning]:
+    """
+    Кеш справочников включен, но кеш django не общий для процессов
+
+    Args:
+        app_configs: проверяемые приложения
+
+    Returns:
+        list[Warning]: предупреждения
+    """
+
+    if not settings.HANDBOOK_CACHE or HandbookLoader.is_cache_enabled():
+        return []
+
+    return [
+        Warning(
+            "Кеш справочников отключен: кеш django не общий для процессов, "
+            "и сброс версии справочника в одном воркере не виден другим",
+            hint="Задайте CACHE_URL (redis) или HANDBOOK_CACHE=False",
+            id="gas_service.W001",
+        )
+    ]
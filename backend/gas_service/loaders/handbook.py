@@ -1,13 +1,18 @@
 import polars as pl
 from common.creator import DefaultCreator
+from common.normalization import NameNormalizer
+from django.db import connection, models
 from gas_service.models import GSIndicator, GSInstallation, GSTypePlan
+from gas_service.queries import HandbookLoader
 
 
-class IndicatorLoader(DefaultCreator):
+class HandbookCreator(DefaultCreator):
     """
-    Класс для загрузки данных в справочник "Показатель"
+    Общий класс для загрузки данных в справочники
     """
 
+    model: models.Model
+
     def create_instances(self, data: pl.DataFrame) -> None:
         """
         Метод для создания списка инстансов
@@ -16,36 +21,107 @@ class IndicatorLoader(DefaultCreator):
             data pl.DataFrame: датафрейм для Справочника
         """
 
-        return self.save_instances_to_db(GSIndicator, data.to_dicts())
-
+        # bulk_create не вызывает save модели, ключ заполняем сами
+        data = data.with_columns(NameNormalizer.expr("name").alias("name_key"))
+        instances = self.save_instances_to_db(self.model, data.to_dicts())
+        HandbookLoader.invalidate(self.model)
 
-class InstallationLoader(DefaultCreator):
-    """
-    Класс для загрузки данных в справочник "Установка"
-    """
+        return instances
 
-    def create_instances(self, data: pl.DataFrame) -> None:
+    def upsert_instances(self, data: pl.DataFrame) -> int:
         """
-        Метод для создания списка инстансов
+        Добавление наименований, которых еще нет в справочнике
+
+        На postgres это один запрос INSERT ... ON CONFLICT DO NOTHING: в БД уходят
+        только наименования из файла, а параллельный импорт тех же наименований
+        не падает на уникальности. Наименования сопоставляются по ключу name_key,
+        как и при валидации
 
         Args:
-            data pl.DataFrame: датафрейм для Справочника
+            data (pl.DataFrame): name и created_by_id из файла
+
+        Returns:
+            int: сколько наименований добавлено
         """
 
-        return self.save_instances_to_db(GSInstallation, data.to_dicts())
+        if data.is_empty():
+            return 0
 
+        data = data.select(
+            "name",
+            NameNormalizer.expr("name").alias("name_key"),
+            "created_by_id",
+        )
 
-class TypePlanLoader(DefaultCreator):
-    """
-    Класс для загрузки данных в справочник "Тип плана"
-    """
+        if connection.vendor != "postgresql":
+            return self.__upsert_by_handbook(data)
 
-    def create_instances(self, data: pl.DataFrame) -> None:
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        values = ", ".join(["(%s, %s, %s::bigint)"] * len(data))
+        sql = f"""
+            INSERT INTO {table}
+                (name, name_key, created_by_id, created_datetime, updated_datetime)
+            SELECT DISTINCT ON (name_key)
+                name, name_key, created_by_id, now(), now()
+            FROM (VALUES {values}) AS file_data (name, name_key, created_by_id)
+            ORDER BY name_key, name
+            ON CONFLICT (name_key) DO NOTHING
         """
-        Метод для создания списка инстансов
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                sql,
+                [value for row in data.iter_rows() for value in row],
+            )
+            created = cursor.rowcount
+
+        # вставка мимо ORM, сигналы не сработали
+        if created:
+            HandbookLoader.invalidate(self.model)
+
+        return created
+
+    def __upsert_by_handbook(self, data: pl.DataFrame) -> int:
+        """
+        Добавление отсутствующих наименований через выгрузку справочника,
+        для БД без ON CONFLICT
 
         Args:
-            data pl.DataFrame: датафрейм для Справочника
+            data (pl.DataFrame): name, name_key и created_by_id из файла
+
+        Returns:
+            int: сколько наименований добавлено
         """
 
-        return self.save_instances_to_db(GSTypePlan, data.to_dicts())
+        handbook = HandbookLoader.get_handbook(self.model)
+        missing = data.join(
+            handbook, left_on="name_key", right_on="name", how="anti"
+        ).unique(subset="name_key", keep="first", maintain_order=True)
+        if not missing.is_empty():
+            self.create_instances(missing.drop("name_key"))
+
+        return missing.height
+
+
+class IndicatorLoader(HandbookCreator):
+    """
+    Класс для загрузки данных в справочник "Показатель"
+    """
+
+    model = GSIndicator
+
+
+class InstallationLoader(HandbookCreator):
+    """
+    Класс для загрузки данных в справочник "Установка"
+    """
+
+    model = GSInstallation
+
+
+class TypePlanLoader(HandbookCreator):
+    """
+    Класс для загрузки данных в справочник "Тип плана"
+    """
+
+    model = GSTypePlan
@@ -1,5 +1,5 @@
 import polars as pl
-from common.creator import DefaultCreator
+from common.creator import DefaultCreator, DeltaInstances, UpdateStrategy
 
 
 class ProductionProductLoader(DefaultCreator):
@@ -7,10 +7,16 @@ class ProductionProductLoader(DefaultCreator):
     Класс для создания инстансов из файла "Выработка продукции"
     """
 
+    use_copy = True
+    update_strategy = UpdateStrategy.COPY
+    # по этим колонкам строка файла сопоставляется со строкой в БД
+    key_columns = ["date", "indicator_id", "installation_id", "type_plan_id"]
+    value_columns = ["value"]
+
     def create_instances(
         self,
         data: pl.DataFrame,
-    ) -> list[dict]:
+    ) -> pl.DataFrame:
         """
         Метод для создания списка инстансов
 
@@ -18,7 +24,29 @@ class ProductionProductLoader(DefaultCreator):
             data (pl.DataFrame): датафреймы из файла
 
         Returns:
-            list[dict]: данные для записи в БД
+            pl.DataFrame: данные для записи в БД
         """
 
-        return data.rename(str.lower).to_dicts()
+        return data.rename(str.lower)
+
+    def create_delta(
+        self,
+        data: pl.DataFrame,
+        current: pl.DataFrame,
+    ) -> DeltaInstances:
+        """
+        Метод для поиска строк, которые нужно добавить, изменить или удалить
+
+        Args:
+            data (pl.DataFrame): датафреймы из файла
+            current (pl.DataFrame): текущие данные из БД
+
+        Returns:
+            DeltaInstances: изменения для записи в БД
+        """
+
+        data = data.rename(str.lower).with_columns(pl.col("date").cast(pl.Date))
+
+        return self.get_delta_instances(
+            data, current, self.key_columns, self.value_columns
+        )
@@ -0,0 +1,70 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from gas_service.benchmark import ImportBenchmark
+
+
+class Command(BaseCommand):
+    """
+    Замер этапов импорта на сгенерированных файлах
+
+    Результат пишется в json, который можно сравнить с прошлым запуском
+    через --baseline
+    """
+
+    help = "Замер ProductionProductParcer и HandbookParcer на синтетических файлах"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            nargs="+",
+            default=[1_000, 10_000, 100_000],
+            help="Строк показателей на каждом листе",
+        )
+        parser.add_argument(
+            "--installations", type=int, default=50, help="Установок на листе"
+        )
+        parser.add_argument("--repeat", type=int, default=3, help="Повторов замера")
+        parser.add_argument(
+            "--workdir",
+            type=Path,
+            default=Path("files/benchmark"),
+            help="Папка для сгенерированных файлов, созданные файлы переиспользуются",
+        )
+        parser.add_argument(
+            "--output", type=Path, default=None, help="Файл для результата в json"
+        )
+        parser.add_argument(
+            "--baseline", type=Path, default=None, help="json прошлого запуска"
+        )
+
+    def handle(self, *args, **options):
+        options["workdir"].mkdir(parents=True, exist_ok=True)
+
+        benchmark = ImportBenchmark(
+            options["workdir"], options["repeat"], options["installations"]
+        )
+        benchmark.run(options["rows"])
+        result = benchmark.as_json()
+
+        for item in result["results"]:
+            self.stdout.write(
+                f"{item['case']} [{item['scale']}]: "
+                f"{item['median']:.3f} с, строк {item['rows']}"
+            )
+
+        if options["output"] is not None:
+            options["output"].write_text(
+                json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8"
+            )
+
+        if options["baseline"] is not None:
+            baseline = json.loads(options["baseline"].read_text(encoding="utf-8"))
+            for item in ImportBenchmark.compare(result, baseline):
+                self.stdout.write(
+                    f"{item['case']} [{item['scale']}]: "
+                    f"{item['baseline']:.3f} -> {item['current']:.3f} с "
+                    f"(x{item['ratio']})"
+                )
@@ -0,0 +1,97 @@
+import time
+from datetime import date
+
+import polars as pl
+from common.creator import UpdateStrategy
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from gas_service.loaders.production_product import ProductionProductLoader
+from gas_service.models import (
+    GSIndicator,
+    GSInstallation,
+    GSProductionProduct,
+    GSTypePlan,
+)
+
+
+class Command(BaseCommand):
+    """
+    Сравнение способов массового обновления "Выработки продукции"
+
+    Все изменения откатываются после замера
+    """
+
+    help = "Замер скорости update_instances_to_db для каждого UpdateStrategy"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", type=int, default=100_000, help="Количество строк"
+        )
+        parser.add_argument(
+            "--strategy",
+            nargs="+",
+            choices=UpdateStrategy.get_values(),
+            default=UpdateStrategy.get_values(),
+            help="Способы обновления",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            ids = self.__create_rows(options["rows"])
+
+            for strategy in options["strategy"]:
+                loader = ProductionProductLoader()
+                loader.update_strategy = UpdateStrategy(strategy)
+                data = pl.DataFrame({"id": ids}).with_columns(
+                    value=pl.int_range(pl.len()).cast(pl.Float64) + time.time()
+                )
+
+                start = time.perf_counter()
+                with transaction.atomic():
+                    loader.update_instances_to_db(
+                        GSProductionProduct, data, loader.value_columns
+                    )
+                elapsed = time.perf_counter() - start
+
+                self.stdout.write(
+                    f"{connection.vendor} {strategy}: "
+                    f"{len(data)} строк за {elapsed:.2f} с"
+                )
+
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def __create_rows(rows: int) -> list[int]:
+        """
+        Создание строк для замера
+
+        Args:
+            rows (int): количество строк
+
+        Returns:
+            list[int]: id созданных строк
+        """
+
+        indicator = GSIndicator.objects.create(name="benchmark_update")
+        installation = GSInstallation.objects.create(name="benchmark_update")
+        type_plan = GSTypePlan.objects.create(name="benchmark_update")
+
+        loader = ProductionProductLoader()
+        loader.save_instances_to_db(
+            GSProductionProduct,
+            pl.DataFrame(
+                {
+                    "date": [date(2000, 1, 1)] * rows,
+                    "indicator_id": indicator.pk,
+                    "installation_id": installation.pk,
+                    "type_plan_id": type_plan.pk,
+                    "value": 0.0,
+                }
+            ),
+        )
+
+        return list(
+            GSProductionProduct.objects.filter(indicator=indicator).values_list(
+                "id", flat=True
+            )
+        )
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("gas_service", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="gsindicator",
+            name="name_key",
+            field=models.CharField(
+                editable=False,
+                max_length=128,
+                null=True,
+                verbose_name="Ключ наименования",
+            ),
+        ),
+        migrations.AddField(
+            model_name="gsinstallation",
+            name="name_key",
+            field=models.CharField(
+                editable=False,
+                max_length=128,
+                null=True,
+                verbose_name="Ключ наименования",
+            ),
+        ),
+        migrations.AddField(
+            model_name="gstypeplan",
+            name="name_key",
+            field=models.CharField(
+                editable=False,
+                max_length=128,
+                null=True,
+                verbose_name="Ключ наименования",
+            ),
+        ),
+    ]
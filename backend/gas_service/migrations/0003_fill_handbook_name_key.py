@@ -0,0 +1,65 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:00
+
+from django.db import migrations
+
+HANDBOOKS = ("GSIndicator", "GSInstallation", "GSTypePlan")
+
+
+def normalize(name: str) -> str:
+    """
+    Ключ наименования на момент миграции: без пробелов по краям, в нижнем
+    регистре, пробелы внутри схлопнуты в один
+
+    Копия common.normalization.NameNormalizer.normalize, чтобы изменение
+    нормализации в коде не меняло уже примененную миграцию
+    """
+
+    return " ".join(name.split()).lower()
+
+
+def fill_name_key(apps, schema_editor):
+    """
+    Заполнение ключа наименования
+
+    Записи, совпадающие по ключу (отличаются регистром или пробелами), миграция
+    не объединяет: на них может ссылаться выработка с теми же датой и типом
+    плана. Если такие записи есть, миграция падает с их перечнем, дубли
+    нужно объединить вручную и повторить миграцию
+    """
+
+    conflicts: list[str] = []
+
+    for model_name in HANDBOOKS:
+        model = apps.get_model("gas_service", model_name)
+        names: dict[str, list[str]] = {}
+        handbooks = list(model.objects.order_by("id"))
+
+        for handbook in handbooks:
+            handbook.name_key = normalize(handbook.name)
+            names.setdefault(handbook.name_key, []).append(
+                f"'{handbook.name}' (id={handbook.id})"
+            )
+
+        conflicts.extend(
+            f"{model._meta.verbose_name}: {', '.join(duplicates)}"
+            for duplicates in names.values()
+            if len(duplicates) > 1
+        )
+        model.objects.bulk_update(handbooks, ["name_key"], batch_size=1000)
+
+    if conflicts:
+        raise RuntimeError(
+            "В справочниках есть наименования, которые отличаются только "
+            "регистром или пробелами:\n" + "\n".join(conflicts)
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("gas_service", "0002_handbook_name_key"),
+    ]
+
+    operations = [
+        # при откате поле удаляется миграцией 0002, данные не меняются
+        migrations.RunPython(fill_name_key, migrations.RunPython.noop),
+    ]
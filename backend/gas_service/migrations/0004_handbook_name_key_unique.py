@@ -0,0 +1,42 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("gas_service", "0003_fill_handbook_name_key"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="gsindicator",
+            name="name_key",
+            field=models.CharField(
+                editable=False,
+                max_length=128,
+                unique=True,
+                verbose_name="Ключ наименования",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="gsinstallation",
+            name="name_key",
+            field=models.CharField(
+                editable=False,
+                max_length=128,
+                unique=True,
+                verbose_name="Ключ наименования",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="gstypeplan",
+            name="name_key",
+            field=models.CharField(
+                editable=False,
+                max_length=128,
+                unique=True,
+                verbose_name="Ключ наименования",
+            ),
+        ),
+    ]
@@ -1,12 +1,13 @@
 from common.models import DomainModel
+from common.normalization import NameNormalizer
 
 # Create your models here.
 from django.db import models
 
 
-class GSIndicator(DomainModel):
+class GSHandbook(DomainModel):
     """
-    Модель, описывающая справочник "Показатель"
+    Общие поля справочников
     """
 
     name = models.CharField(
@@ -14,48 +15,54 @@ class GSIndicator(DomainModel):
         unique=True,
         verbose_name="Наименование",
     )
+    # по этому ключу строки файлов сопоставляются со справочником,
+    # заполняется при сохранении и загрузчиками справочников
+    name_key = models.CharField(
+        max_length=128,
+        unique=True,
+        editable=False,
+        verbose_name="Ключ наименования",
+    )
+
+    def save(self, *args, **kwargs):
+        self.name_key = NameNormalizer.normalize(self.name)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "name" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "name_key"}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
 
+    class Meta:
+        abstract = True
+
+
+class GSIndicator(GSHandbook):
+    """
+    Модель, описывающая справочник "Показатель"
+    """
+
     class Meta:
         verbose_name = "Показатель"
         verbose_name_plural = "Показатели"
 
 
-class GSInstallation(DomainModel):
+class GSInstallation(GSHandbook):
     """
     Модель, описывающая справочник "Установка"
     """
 
-    name = models.CharField(
-        max_length=128,
-        unique=True,
-        verbose_name="Наименование",
-    )
-
-    def __str__(self):
-        return self.name
-
     class Meta:
         verbose_name = "Установка"
         verbose_name_plural = "Установки"
 
 
-class GSTypePlan(DomainModel):
+class GSTypePlan(GSHandbook):
     """
     Модель, описывающая справочник "Тип плана"
     """
 
-    name = models.CharField(
-        max_length=128,
-        unique=True,
-        verbose_name="Наименование",
-    )
-
-    def __str__(self):
-        return self.name
-
     class Meta:
         verbose_name = "Тип плана"
         verbose_name_plural = "Типы плана"
@@ -3,14 +3,8 @@ from dataclasses import dataclass
 import polars as pl
 from common.enums import DictedEnum
 from common.parcer.abstract import AbstractParcerConfig
-
-
-class ProductionProductExcelConfig(AbstractParcerConfig):
-    """
-    Конфигуратор загрузки файла "Выработка продукции"
-    """
-
-    START_ROW = 3
+from common.parcer.utils import ExcelEngine
+from common.resolver import HandbookResolver
 
 
 class ProductionProductColumns(DictedEnum):
@@ -26,6 +20,38 @@ class ProductionProductColumns(DictedEnum):
     DIFFERENCE_FACT_NETWORK_GRAPH = 7
 
 
+class ProductionProductExcelConfig(AbstractParcerConfig):
+    """
+    Конфигуратор загрузки файла "Выработка продукции"
+    """
+
+    # шапка листа - строка с наименованиями "Тип плана"
+    START_ROW = 4
+    ENGINE = ExcelEngine.CALAMINE.value
+    PARALLEL_SHEETS = True
+    CACHE = True
+    # значения читаются строками и приводятся к числам в парсере: при чтении
+    # сразу в Float64 текст в ячейке стал бы пустым значением, и строка показателя
+    # с текстом в "ФАКТ-СГ" была бы принята за установку
+    SCHEMA = {
+        ProductionProductColumns.INDICATOR_ID.name: pl.String,
+        ProductionProductColumns.PP_M03.name: pl.String,
+        ProductionProductColumns.NETWORK_GRAPH.name: pl.String,
+        ProductionProductColumns.FACT.name: pl.String,
+        ProductionProductColumns.DIFFERENCE_FACT_PP_M03.name: pl.String,
+        ProductionProductColumns.DIFFERENCE_FACT_NETWORK_GRAPH.name: pl.String,
+    }
+    # типы колонок со значениями после разбора
+    VALUES_SCHEMA = {
+        ProductionProductColumns.PP_M03.name: pl.Float64,
+        ProductionProductColumns.NETWORK_GRAPH.name: pl.Float64,
+        ProductionProductColumns.FACT.name: pl.Float64,
+        ProductionProductColumns.DIFFERENCE_FACT_PP_M03.name: pl.Float64,
+        ProductionProductColumns.DIFFERENCE_FACT_NETWORK_GRAPH.name: pl.Float64,
+    }
+    VERSION = 2
+
+
 class ProductionProductColumnsLoadDB(DictedEnum):
     """
     Наименования колонок для загрузки в БД файла "Выработка продукции"
@@ -46,14 +72,24 @@ class HandbookColumns(DictedEnum):
     TYPE_PLAN_ID = 2
 
 
+class HandbookExcelConfig(AbstractParcerConfig):
+    """
+    Конфигуратор загрузки справочников
+    """
+
+    ENGINE = ExcelEngine.CALAMINE.value
+    CACHE = True
+    SCHEMA = {column.name: pl.String for column in HandbookColumns}
+
+
 @dataclass
 class ValidationData:
     """
     Параметры для валидации наименований
     """
 
+    # наименования из файла с найденным в справочнике id
     data: pl.DataFrame = None
-    loader: pl.DataFrame = None
     column_identificator: str = ""
     name_handbook_for_user: str = ""
 
@@ -65,5 +101,5 @@ class DataFrameData:
     """
 
     data: pl.DataFrame = None
-    loader: pl.DataFrame = None
+    resolver: HandbookResolver = None
     column_identificator: str = ""
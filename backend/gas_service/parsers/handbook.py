@@ -1,10 +1,10 @@
+from typing import Optional
+
 import polars as pl
-from common.parcer.abstract import AbstractParcerConfig, PolarsParcer
+from common.parcer.abstract import PolarsParcer
 from django.core.files.uploadedfile import InMemoryUploadedFile
 from gas_service.exceptions import EmptyFile
-from gas_service.models import GSIndicator, GSInstallation, GSTypePlan
-from gas_service.parsers.config import HandbookColumns
-from gas_service.queries import HandbookLoader
+from gas_service.parsers.config import HandbookColumns, HandbookExcelConfig
 
 
 class HandbookParcer(PolarsParcer):
@@ -12,12 +12,17 @@ class HandbookParcer(PolarsParcer):
     Парсер для загрузки Справочников
     """
 
-    def __init__(self, excel_file: InMemoryUploadedFile, user_id: int) -> None:
+    def __init__(
+        self,
+        excel_file: InMemoryUploadedFile,
+        user_id: int,
+        content_hash: Optional[str] = None,
+    ) -> None:
         super().__init__(
             excel_file,
-            excel_config=AbstractParcerConfig,
+            excel_config=HandbookExcelConfig,
             columns_identifier=HandbookColumns,
-            dtype=str,
+            content_hash=content_hash,
         )
         self.user_id = user_id
         self._validate()
@@ -64,35 +69,38 @@ class HandbookParcer(PolarsParcer):
             ]
         )
 
-    def create_records(self) -> tuple[pl.DataFrame, pl.DataFrame, pl.DataFrame]:
+    def get_records(self) -> tuple[pl.DataFrame, pl.DataFrame, pl.DataFrame]:
         """
-        Генерация таблицы для преобразования в объекты django
+        Все уникальные наименования из файла для каждого справочника
 
         Returns:
-            tuple[pl.DataFrame, pl.DataFrame, pl.DataFrame]: данные для записи в справочники
+            tuple[pl.DataFrame, pl.DataFrame, pl.DataFrame]: name и created_by_id
+                для "Показателя", "Установки" и "Типа плана"
         """
 
-        indicator_df = self.__get_data(HandbookColumns.INDICATOR_ID.name)
-        installation_df = self.__get_data(HandbookColumns.INSTALLATION_ID.name)
-        type_plan_df = self.__get_data(HandbookColumns.TYPE_PLAN_ID.name)
-
-        indicator_to_create = HandbookParcer.select_data_missing_db(
-            indicator_df,
-            HandbookLoader.get_handbook(GSIndicator),
-            HandbookColumns.INDICATOR_ID.name,
-        )
-        installation_to_create = HandbookParcer.select_data_missing_db(
-            installation_df,
-            HandbookLoader.get_handbook(GSInstallation),
-            HandbookColumns.INSTALLATION_ID.name,
-        )
-        type_plan_to_create = HandbookParcer.select_data_missing_db(
-            type_plan_df,
-            HandbookLoader.get_handbook(GSTypePlan),
-            HandbookColumns.TYPE_PLAN_ID.name,
+        return tuple(
+            self.__get_data(column.name).rename({column.name: "name"})
+            for column in [
+                HandbookColumns.INDICATOR_ID,
+                HandbookColumns.INSTALLATION_ID,
+                HandbookColumns.TYPE_PLAN_ID,
+            ]
         )
 
-        return indicator_to_create, installation_to_create, type_plan_to_create
+    def create_records(self) -> tuple[pl.DataFrame, pl.DataFrame, pl.DataFrame]:
+        """
+        Генерация таблицы для преобразования в объекты django
+
+        Наименования сопоставляются со справочниками по ключу при записи
+        (HandbookCreator.upsert_instances), поэтому это те же записи, что и в
+        get_records
+
+        Returns:
+            tuple[pl.DataFrame, pl.DataFrame, pl.DataFrame]: name и created_by_id
+                для "Показателя", "Установки" и "Типа плана"
+        """
+
+        return self.get_records()
 
     def __get_data(self, column: str) -> pl.DataFrame:
         """
@@ -111,37 +119,3 @@ class HandbookParcer(PolarsParcer):
             .unique()
             .with_columns(pl.lit(self.user_id).alias("created_by_id"))
         )
-
-    @staticmethod
-    def select_data_missing_db(
-        data: pl.DataFrame, loader: pl.DataFrame, column: str
-    ) -> pl.DataFrame:
-        """
-        Выбор данных отсутсвующих в справочнике
-
-        Args:
-            data (pl.DataFrame): данные из файла
-            loader (pl.DataFrame): выгруженный справочник
-            column (str): наименование колонки
-
-        Returns:
-            dataframe (pl.DataFrame): данные отсутвующие в справочнике
-        """
-
-        if data[column].dtype == pl.String:
-            data = data.with_columns(
-                (pl.col(column).str.to_lowercase()).alias("lower_column")
-            )
-
-            merged_data = data.join(
-                loader,
-                left_on="lower_column",
-                right_on="name",
-                how="left",
-            ).rename({column: "name"})
-
-            return merged_data.filter(pl.col("id").is_null()).drop(
-                ["id", "lower_column"]
-            )
-
-        return pl.DataFrame(schema={"name": pl.String, "created_by_id": int})
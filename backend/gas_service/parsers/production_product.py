@@ -3,8 +3,10 @@ from typing import Optional
 
 import pandas as pd
 import polars as pl
+from common.enums import DictedEnum
+from common.normalization import NameNormalizer
 from common.parcer.abstract import PolarsParcer
-from common.validation_errors import PresentationDataForError
+from common.resolver import HandbookResolver
 from django.core.files.uploadedfile import InMemoryUploadedFile
 from gas_service.models import GSIndicator, GSInstallation, GSTypePlan
 from gas_service.parsers.config import (
@@ -23,111 +25,149 @@ class ProductionProductParcer(PolarsParcer):
     Парсер файла "Выработка продукции"
     """
 
-    def __init__(self, excel_file: InMemoryUploadedFile, user_id: int) -> None:
+    # временная колонка с исходными наименованиями колонок файла после unpivot
+    header_column: str = "HEADER"
+    # наименования "Тип плана" из шапки каждого листа
+    headers: pl.DataFrame
+    # строка установки: ячейка "ФАКТ-СГ" в файле пустая
+    installation_column: str = "IS_INSTALLATION"
+    # в строке есть значения, которые не приводятся к числу
+    invalid_values_column: str = "HAS_INVALID_VALUES"
+
+    def __init__(
+        self,
+        excel_file: InMemoryUploadedFile,
+        user_id: int,
+        content_hash: Optional[str] = None,
+    ) -> None:
+        # весь разбор строится как один ленивый план и собирается в create_records
         super().__init__(
             excel_file,
             excel_config=ProductionProductExcelConfig,
             columns_identifier=ProductionProductColumns,
+            lazy=True,
             skiprows=ProductionProductExcelConfig.START_ROW,
-            dtype={col.name: str for col in ProductionProductColumns},
             sheet_name=[str(number).zfill(2) for number in range(1, 13)],
+            content_hash=content_hash,
         )
         ProductionProductValidator.is_empty_file(self._df)
         self.user_id = user_id
         self._filter()
-        self.indicators: pl.DataFrame = None
-        self.installations: pl.DataFrame = None
-        self.types_plan: pl.DataFrame = None
+        self.indicators: HandbookResolver = None
+        self.installations: HandbookResolver = None
+        self.types_plan: HandbookResolver = None
+        # количество строк файла по справочникам, считается при валидации
+        self.rows_count: dict[str, int] = {}
         self.user_column_names = self._get_user_column_names(
             ProductionProductColumns,
             ["ПП М03", "Сетевой график (СГ)", "ФАКТ", "ФАКТ-ПП М03", "ФАКТ-СГ"],
         )
 
-    def _filter(self, types=None) -> pl.DataFrame:
+    def _filter(self, types=None) -> pl.LazyFrame:
         """
         Фильтр необходимых данных по параметрам
 
         Returns:
-            dataframe (pl.DataFrame): отфильтрованные данные
+            dataframe (pl.LazyFrame): отфильтрованные данные
         """
 
-        self._df: pl.DataFrame = self._df.select(
-            [
-                pl.when(pl.col(column) == "nan")
-                .then(None)
-                .otherwise(pl.col(column))
-                .alias(column)
-                for column in self._df.columns
-                if column != "DATE"
-            ]
-            + ["DATE"]
-        )
-
-        self._df = self._df.filter(
+        self._df: pl.LazyFrame = self._df.filter(
             pl.col(ProductionProductColumns.INDICATOR_ID.name).is_not_null()
             | pl.col(ProductionProductColumns.PP_M03.name).is_not_null()
-        )
+        ).with_columns(NameNormalizer.expr(ProductionProductColumns.INDICATOR_ID.name))
 
-        self._df = self._df.select(
-            [pl.all().exclude("DATE").str.strip_chars().str.to_lowercase()] + ["DATE"]
-        )
-
-    def _validate(self, types=None) -> list[Optional[dict]]:
+    def _validate(self, types=None) -> pl.DataFrame:
         """
         Валидация входных данных
 
         Returns:
-            err_list (Optional[list[PresentationDataForError]]): перечень ошибок для пользователя
+            pl.DataFrame: отчет об ошибках для пользователя, пустой если ошибок нет
         """
 
-        err_list: list[Optional[PresentationDataForError]] = []
         validator = ProductionProductValidator()
 
-        self.indicators = HandbookLoader.get_handbook(GSIndicator)
-        self.installations = HandbookLoader.get_handbook(GSInstallation)
-        self.types_plan = HandbookLoader.get_handbook(GSTypePlan)
+        self.indicators = HandbookResolver(HandbookLoader.get_handbook(GSIndicator))
+        self.installations = HandbookResolver(
+            HandbookLoader.get_handbook(GSInstallation)
+        )
+        self.types_plan = HandbookResolver(HandbookLoader.get_handbook(GSTypePlan))
+
+        # наименования переводятся в id за один проход по файлу,
+        # общий для всех выборок фильтр считается один раз
+        (
+            indicators_data,
+            installations_data,
+            types_plan_data,
+            invalid_values_data,
+        ) = pl.collect_all(
+            [
+                self.__get_indicators().with_columns(
+                    self.indicators.resolve(
+                        ProductionProductColumns.INDICATOR_ID.name
+                    ).alias("id")
+                ),
+                self.__get_installations().with_columns(
+                    self.installations.resolve(
+                        ProductionProductColumns.INDICATOR_ID.name
+                    ).alias("id")
+                ),
+                self.__get_type_plan().with_columns(
+                    self.types_plan.resolve(
+                        ProductionProductColumnsLoadDB.TYPE_PLAN_ID.name
+                    ).alias("id")
+                ),
+                self.__get_invalid_values(),
+            ]
+        )
+
+        self.rows_count = {
+            "indicators": indicators_data.height,
+            "installations": installations_data.height,
+            "types_plan": types_plan_data.height,
+        }
 
         indicators = ValidationData(
-            data=self.__get_indicators(),
-            loader=self.indicators,
+            data=indicators_data,
             column_identificator=ProductionProductColumns.INDICATOR_ID.name,
             name_handbook_for_user="Показатель",
         )
         installations = ValidationData(
-            data=self.__get_installations(),
-            loader=self.installations,
+            data=installations_data,
             column_identificator=ProductionProductColumns.INDICATOR_ID.name,
             name_handbook_for_user="Установка",
         )
         types_plan = ValidationData(
-            data=self.__get_type_plan(),
-            loader=self.types_plan,
+            data=types_plan_data,
             column_identificator=ProductionProductColumnsLoadDB.TYPE_PLAN_ID.name,
             name_handbook_for_user="Тип плана",
         )
 
         validations_list = [indicators, installations, types_plan]
         for validation_data in validations_list:
-            err_list = validator.validate_input_fields(
+            validator.validate_input_fields(
                 validation_data.data,
-                validation_data.loader,
                 validation_data.column_identificator,
                 validation_data.name_handbook_for_user,
             )
+        validator.validate_values(
+            invalid_values_data,
+            ProductionProductColumns.INDICATOR_ID.name,
+            indicators.name_handbook_for_user,
+        )
 
-        return [ob.__dict__ for ob in err_list]
+        return validator.get_report()
 
-    def _preprocess(self, types=None) -> pl.DataFrame:
+    def _preprocess(self, types=None) -> pl.LazyFrame:
         """
         Предобработка входных данных
 
         Returns:
-            dataframe (pl.DataFrame): преобразованные данные
+            dataframe (pl.LazyFrame): преобразованные данные
         """
 
         self.__select_installations()
-        self.__replace_header()
         self.__convert_data_to_db()
+        self.__replace_header()
 
     def create_records(self) -> pl.DataFrame:
         """
@@ -140,223 +180,330 @@ class ProductionProductParcer(PolarsParcer):
         self._preprocess()
 
         indicators = DataFrameData(
-            loader=self.indicators,
+            resolver=self.indicators,
             column_identificator=ProductionProductColumns.INDICATOR_ID.name,
         )
         installations = DataFrameData(
-            loader=self.installations,
+            resolver=self.installations,
             column_identificator=ProductionProductColumnsLoadDB.INSTALLATION_ID.name,
         )
         types_plan = DataFrameData(
-            loader=self.types_plan,
+            resolver=self.types_plan,
             column_identificator=ProductionProductColumnsLoadDB.TYPE_PLAN_ID.name,
         )
         data_list = [indicators, installations, types_plan]
-        for data in data_list:
-            self._df = self.__replace_value_columns_by_id(
-                data.loader,
-                data.column_identificator,
-            )
+        self._df = self.__replace_value_columns_by_id(data_list)
 
-        return self._df.with_columns(pl.lit(self.user_id).alias("created_by_id"))
+        return self._df.with_columns(
+            pl.lit(self.user_id).alias("created_by_id")
+        ).collect()
 
-    def _perform_data(self, data: dict, dtype: dict | None) -> pd.DataFrame:
+    def _rename_file_columns(
+        self,
+        df: dict[str, pd.DataFrame | pl.DataFrame],
+        enum_cols: type[DictedEnum],
+    ) -> dict[str, pd.DataFrame | pl.DataFrame]:
         """
-        Обрабатывает датафрейм пандас, подготавливая его к конвертации в датафрейм поларс
+        Переименовывание колонок листов
+
+        Перед переименованием сохраняются наименования "Тип плана" из шапки каждого листа
+
+        Args:
+            df (dict): загруженные листы
+            enum_cols (type[DictedEnum]): идентификатор колонок
+
+        Returns:
+            dict: листы с переименованными колонками
+        """
+
+        self.headers = pl.DataFrame(
+            [
+                (column, user_column, self.__get_sheet_date(sheet_name))
+                for sheet_name, sheet_df in df.items()
+                for column, user_column in zip(enum_cols.get_keys(), sheet_df.columns)
+                if column in self.__get_types_plan_columns()
+            ],
+            schema={
+                self.header_column: pl.String,
+                ProductionProductColumnsLoadDB.TYPE_PLAN_ID.name: pl.String,
+                "DATE": pl.Datetime,
+            },
+            orient="row",
+        ).with_columns(
+            NameNormalizer.expr(ProductionProductColumnsLoadDB.TYPE_PLAN_ID.name)
+        )
+
+        return super()._rename_file_columns(df, enum_cols)
+
+    def _perform_data(
+        self, data: dict, schema: dict[str, pl.DataType] | None
+    ) -> pl.DataFrame:
+        """
+        Обрабатывает листы, приводя их к типам из конфига и объединяя в один датафрейм
 
         Args:
             data (dict): загруженные данные
-            dtype (dict): типы данных для колонок
+            schema (dict[str, pl.DataType] | None): типы данных для колонок
 
         Returns:
-            dataframe (pd.DataFrame): преобразованные данные
+            dataframe (pl.DataFrame): преобразованные данные
         """
 
-        current_year = datetime.now().year
+        # типы приводятся по каждому листу, иначе листы могут не сойтись по схеме
+        df_list: list[pl.DataFrame] = []
+        for sheet_name, sheet_df in data.items():
+            df_list.append(
+                self.__convert_values(
+                    super()._perform_data(sheet_df, schema)
+                ).with_columns(pl.lit(self.__get_sheet_date(sheet_name)).alias("DATE"))
+            )
+
+        return pl.concat(df_list)
 
-        df_list: list[pd.DataFrame] = [
-            v.assign(DATE=datetime(current_year, int(k), 1)) for k, v in data.items()
-        ]
+    def __convert_values(self, df: pl.DataFrame) -> pl.DataFrame:
+        """
+        Приведение прочитанных строками значений к числам
+
+        Установки и значения, которые не приводятся к числу, отмечаются по ячейкам
+        файла до приведения
+
+        Args:
+            df (pl.DataFrame): лист со значениями строками
+
+        Returns:
+            dataframe (pl.DataFrame): лист с числовыми значениями и отметками строк
+        """
+
+        values_schema = ProductionProductExcelConfig.VALUES_SCHEMA
+        df = df.with_columns(
+            pl.col(column).str.strip_chars().replace("", None)
+            for column in values_schema
+        )
+
+        return df.with_columns(
+            pl.col(ProductionProductColumns.DIFFERENCE_FACT_NETWORK_GRAPH.name)
+            .is_null()
+            .alias(self.installation_column),
+            pl.any_horizontal(
+                pl.col(column).is_not_null()
+                & pl.col(column).cast(dtype, strict=False).is_null()
+                for column, dtype in values_schema.items()
+            ).alias(self.invalid_values_column),
+        ).with_columns(
+            pl.col(column).cast(dtype, strict=False)
+            for column, dtype in values_schema.items()
+        )
+
+    def _get_cache_key_parts(self) -> list[str]:
+        """
+        Части ключа кеша разбора: даты листов берутся по текущему году, поэтому
+        после смены года тот же файл разбирается заново
+        """
+
+        return [str(datetime.now().year)]
+
+    def _get_cached_frame_names(
+        self, columns_identifier: type[DictedEnum] | None
+    ) -> list[str]:
+        """
+        Имена датафреймов в записи кеша разбора, вместе с шапками листов
+        """
+
+        return super()._get_cached_frame_names(columns_identifier) + ["headers"]
+
+    def _get_cached_frames(self, df: pl.DataFrame) -> dict[str, pl.DataFrame]:
+        """
+        Датафреймы для сохранения в кеш разбора, вместе с шапками листов
+        """
 
-        pandas_df: pd.DataFrame = pd.concat(df_list, ignore_index=True)
+        return super()._get_cached_frames(df) | {"headers": self.headers}
 
-        return super()._perform_data(pandas_df, dtype)
+    def _restore_cached_frames(self, frames: dict[str, pl.DataFrame]) -> None:
+        """
+        Восстановление состояния парсера из кеша разбора, вместе с шапками листов
+        """
+
+        super()._restore_cached_frames(frames)
+        self.headers = frames["headers"]
+
+    @staticmethod
+    def __get_sheet_date(sheet_name: str) -> datetime:
+        """
+        Дата листа, листы называются по номеру месяца
+
+        Args:
+            sheet_name (str): наименование листа
+
+        Returns:
+            datetime: первое число месяца текущего года
+        """
 
-    def __get_type_plan(self) -> pl.DataFrame:
+        return datetime(datetime.now().year, int(sheet_name), 1)
+
+    def __get_type_plan(self) -> pl.LazyFrame:
         """
         Получение наименований "Тип плана"
 
         Returns:
-            dataframe (pl.DataFrame): данные по Типам плана
+            dataframe (pl.LazyFrame): данные по Типам плана
         """
 
         return (
-            self._df.filter(
-                (pl.col(ProductionProductColumns.INDICATOR_ID.name).is_null())
-            )
-            .select(
-                pl.all().exclude([ProductionProductColumns.INDICATOR_ID.name, "DATE"])
-            )
-            .filter(~pl.all_horizontal(pl.all().is_in([None, "0"])))
-            .unpivot(value_name=ProductionProductColumnsLoadDB.TYPE_PLAN_ID.name)
-            .unique(subset=ProductionProductColumnsLoadDB.TYPE_PLAN_ID.name)
+            self.headers.lazy()
             .select(ProductionProductColumnsLoadDB.TYPE_PLAN_ID.name)
+            .drop_nulls()
         )
 
-    def __get_installations(self) -> pl.DataFrame:
+    def __get_installations(self) -> pl.LazyFrame:
         """
         Получение наименований "Установок"
 
         Returns:
-            dataframe (pl.DataFrame): данные по Установкам
+            dataframe (pl.LazyFrame): данные по Установкам
         """
 
-        return (
-            self._df.filter(
-                (
-                    pl.col(
-                        ProductionProductColumns.DIFFERENCE_FACT_NETWORK_GRAPH.name
-                    ).is_null()
-                )
-                & (pl.col(ProductionProductColumns.INDICATOR_ID.name).is_not_null())
-            )
-            .select(pl.col(ProductionProductColumns.INDICATOR_ID.name))
-            .unique()
-        )
+        return self._df.filter(
+            pl.col(self.installation_column)
+            & (pl.col(ProductionProductColumns.INDICATOR_ID.name).is_not_null())
+        ).select(pl.col(ProductionProductColumns.INDICATOR_ID.name))
 
-    def __get_indicators(self) -> pl.DataFrame:
+    def __get_indicators(self) -> pl.LazyFrame:
         """
         Получение наименований "Показателей"
 
         Returns:
-            dataframe (pl.DataFrame): данные по Показателям
+            dataframe (pl.LazyFrame): данные по Показателям
         """
 
-        return (
-            self._df.filter(
-                (
-                    pl.col(
-                        ProductionProductColumns.DIFFERENCE_FACT_NETWORK_GRAPH.name
-                    ).is_not_null()
-                )
-                & (pl.col(ProductionProductColumns.INDICATOR_ID.name).is_not_null())
-            )
-            .select(pl.col(ProductionProductColumns.INDICATOR_ID.name))
-            .unique()
-        )
+        return self._df.filter(
+            ~pl.col(self.installation_column)
+            & (pl.col(ProductionProductColumns.INDICATOR_ID.name).is_not_null())
+        ).select(pl.col(ProductionProductColumns.INDICATOR_ID.name))
 
-    def __select_installations(self) -> pl.DataFrame:
+    def __get_invalid_values(self) -> pl.LazyFrame:
         """
-        Выделить установки в отдельную колонку
+        Получение "Показателей", у которых есть нечисловые значения
 
         Returns:
-            dataframe (pl.DataFrame): данные по Установкам
+            dataframe (pl.LazyFrame): наименования Показателей
         """
 
-        types_plan_df = self._df.select(
-            pl.all().exclude(ProductionProductColumns.INDICATOR_ID.name)
-        )
-        indicators_installations_df = self._df.select(
-            pl.col(ProductionProductColumns.INDICATOR_ID.name)
-        )
+        return self._df.filter(
+            ~pl.col(self.installation_column)
+            & pl.col(self.invalid_values_column)
+            & (pl.col(ProductionProductColumns.INDICATOR_ID.name).is_not_null())
+        ).select(pl.col(ProductionProductColumns.INDICATOR_ID.name))
 
-        installations_name: list = self.__get_installations()[
-            ProductionProductColumns.INDICATOR_ID.name
-        ]
+    def __select_installations(self) -> pl.LazyFrame:
+        """
+        Выделить установки в отдельную колонку
 
-        indicators_installations_df = indicators_installations_df.with_columns(
-            pl.when(
-                pl.col(ProductionProductColumns.INDICATOR_ID.name).is_in(
-                    installations_name
-                )
+        Returns:
+            dataframe (pl.LazyFrame): данные по Установкам
+        """
+
+        # строка считается установкой, если ее наименование есть среди установок файла
+        is_installation = pl.col(ProductionProductColumns.INDICATOR_ID.name).is_in(
+            pl.col(ProductionProductColumns.INDICATOR_ID.name)
+            .filter(
+                pl.col(self.installation_column)
+                & pl.col(ProductionProductColumns.INDICATOR_ID.name).is_not_null()
             )
-            .then(pl.col(ProductionProductColumns.INDICATOR_ID.name))
-            .otherwise(None)
-            .alias(ProductionProductColumnsLoadDB.INSTALLATION_ID.name)
-        )
-        indicators_installations_df = indicators_installations_df.with_columns(
-            pl.col(ProductionProductColumnsLoadDB.INSTALLATION_ID.name).forward_fill()
+            .implode()
         )
 
-        self._df = pl.concat(
-            [indicators_installations_df, types_plan_df], how="horizontal"
-        ).filter(
-            ~pl.col(ProductionProductColumns.INDICATOR_ID.name).is_in(
-                installations_name
+        self._df = (
+            self._df.with_columns(
+                pl.when(is_installation)
+                .then(pl.col(ProductionProductColumns.INDICATOR_ID.name))
+                .otherwise(None)
+                .forward_fill()
+                .alias(ProductionProductColumnsLoadDB.INSTALLATION_ID.name)
+            )
+            .filter(
+                ~is_installation
+                | pl.col(ProductionProductColumns.INDICATOR_ID.name).is_null()
+            )
+            .select(
+                pl.col(ProductionProductColumns.INDICATOR_ID.name),
+                pl.col(ProductionProductColumnsLoadDB.INSTALLATION_ID.name),
+                pl.all().exclude(
+                    [
+                        ProductionProductColumns.INDICATOR_ID.name,
+                        ProductionProductColumnsLoadDB.INSTALLATION_ID.name,
+                    ]
+                ),
             )
-            | pl.col(ProductionProductColumns.INDICATOR_ID.name).is_null()
         )
 
-    def __replace_header(self) -> pl.DataFrame:
+    def __replace_header(self) -> pl.LazyFrame:
         """
-        Замена шапки
+        Замена шапки, у каждого листа своя шапка с "Типами плана"
 
         Returns:
-            dataframe (pl.DataFrame): преобразованные данные
+            dataframe (pl.LazyFrame): преобразованные данные
         """
 
-        types_plan_df = self._df.select(
-            pl.all().exclude(
-                [
-                    ProductionProductColumns.INDICATOR_ID.name,
-                    ProductionProductColumnsLoadDB.INSTALLATION_ID.name,
-                    "DATE",
-                ]
-            )
-        )
-        new_headers = types_plan_df.row(0)
-        types_plan_df.columns = new_headers
-
-        indicator_installations_df = self._df.select(
-            [
-                pl.col(ProductionProductColumns.INDICATOR_ID.name),
-                ProductionProductColumnsLoadDB.INSTALLATION_ID.name,
-                "DATE",
-            ]
-        )
-
-        self._df = pl.concat(
-            [indicator_installations_df, types_plan_df], how="horizontal"
-        ).filter(pl.col(ProductionProductColumns.INDICATOR_ID.name).is_not_null())
+        self._df = self._df.join(
+            self.headers.lazy(), on=[self.header_column, "DATE"]
+        ).drop(self.header_column)
 
     def __convert_data_to_db(self):
         """
         Преобразование датафрейма в формат для загрузки в БД
 
         Returns:
-            dataframe (pl.DataFrame): преобразованные данные
+            dataframe (pl.LazyFrame): преобразованные данные
         """
 
-        self._df = self._df.unpivot(
+        self._df = self._df.filter(
+            pl.col(ProductionProductColumns.INDICATOR_ID.name).is_not_null()
+        ).unpivot(
+            on=self.__get_types_plan_columns(),
             index=[
                 ProductionProductColumns.INDICATOR_ID.name,
                 ProductionProductColumnsLoadDB.INSTALLATION_ID.name,
                 "DATE",
             ],
             value_name=ProductionProductColumnsLoadDB.VALUE.name,
-            variable_name=ProductionProductColumnsLoadDB.TYPE_PLAN_ID.name,
+            variable_name=self.header_column,
         )
 
+    @staticmethod
+    def __get_types_plan_columns() -> list[str]:
+        """
+        Колонки файла, в шапке которых указаны "Типы плана"
+
+        Returns:
+            list[str]: наименования колонок
+        """
+
+        return [
+            column
+            for column in ProductionProductColumns.get_keys()
+            if column != ProductionProductColumns.INDICATOR_ID.name
+        ]
+
     def __replace_value_columns_by_id(
         self,
-        loader: pl.DataFrame,
-        column_df: str,
-    ) -> pl.DataFrame:
+        data_list: list[DataFrameData],
+    ) -> pl.LazyFrame:
         """
         Замена значений колонок на ID
 
         Args:
-            loader (pl.DataFrame): выгруженный справочник
-            column_df (str): наименование колонки данных их файла
+            data_list (list[DataFrameData]): колонки данных из файла и их справочники
 
         Returns:
-            dataframe (pl.DataFrame): преобразованные данные
+            dataframe (pl.LazyFrame): преобразованные данные
         """
 
-        merge_df = self._df.join(
-            loader,
-            left_on=column_df,
-            right_on="name",
-        )
+        columns = [data.column_identificator for data in data_list]
 
-        return merge_df.with_columns(pl.col("id").alias(column_df)).drop("id")
+        # строки с наименованиями не из справочника отбрасываются, как при join
+        return self._df.with_columns(
+            data.resolver.resolve(data.column_identificator).alias(
+                data.column_identificator
+            )
+            for data in data_list
+        ).drop_nulls(columns)
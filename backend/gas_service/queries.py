@@ -1,31 +1,192 @@
+import time
+from collections import OrderedDict
+from io import BytesIO
+from threading import Lock
+
 import polars as pl
-from django.db import models
-from django.db.models.functions import Lower, Trim
+from common.db_connector import ConnectorManager
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, models, transaction
+from gas_service.models import GSProductionProduct
 
 
 class HandbookLoader:
     """
     Класс для выгрузки данных по Газовому обслуживанию
+
+    Справочники кешируются снимками: в памяти процесса и в redis, общем для
+    всех воркеров. Снимок привязан к версии справочника, версия повышается
+    при любом изменении справочника (сигналы моделей и загрузчики)
+
+    Версия должна быть видна всем процессам, поэтому с кешем django, который
+    не общий для процессов (locmem, dummy), справочники не кешируются
     """
 
-    @staticmethod
-    def get_handbook(model: models.Model) -> pl.DataFrame:
+    schema = {"id": pl.Int64, "name": pl.String}
+    # кеши django, в которых каждый процесс видит только свои ключи
+    process_cache_backends: tuple[str, ...] = (
+        "django.core.cache.backends.locmem.LocMemCache",
+        "django.core.cache.backends.dummy.DummyCache",
+    )
+    # снимки по (модель, версия), самые старые вытесняются
+    __local_cache: OrderedDict[tuple[str, int], pl.DataFrame] = OrderedDict()
+    __lock = Lock()
+
+    @classmethod
+    def get_handbook(cls, model: models.Model) -> pl.DataFrame:
         """
-        Выгрузка справочников
+        Выгрузка справочника в датафрейм
 
         Args:
-            data (QuerySet): сам queryset из джанги
+            model (models.Model): модель справочника
 
         Returns:
-            pl.Dataframe: датафрейм со справочником
+            pl.Dataframe: id и ключ наименования (name) записей справочника
         """
 
-        queryset = model.objects.values("id").annotate(name=Trim(Lower("name")))
+        # внутри транзакции справочник может содержать незакоммиченные строки,
+        # такой снимок нельзя отдавать другим
+        if connection.in_atomic_block or not cls.is_cache_enabled():
+            return cls.__fetch_handbook(model)
 
-        if queryset.count() == 0:
-            dataframe = pl.DataFrame(schema={"id": pl.Int64, "name": pl.String})
+        key = (model._meta.label_lower, cls.__get_version(model))
 
+        with cls.__lock:
+            if key in cls.__local_cache:
+                cls.__local_cache.move_to_end(key)
+                return cls.__local_cache[key]
+
+        snapshot = cache.get(cls.__get_snapshot_key(*key))
+        if snapshot is not None:
+            dataframe = pl.read_ipc(BytesIO(snapshot))
         else:
-            dataframe = pl.from_records(list(queryset))
+            dataframe = cls.__fetch_handbook(model)
+            buffer = BytesIO()
+            dataframe.write_ipc(buffer)
+            cache.set(
+                cls.__get_snapshot_key(*key),
+                buffer.getvalue(),
+                settings.HANDBOOK_CACHE_TIMEOUT,
+            )
+
+        with cls.__lock:
+            cls.__local_cache[key] = dataframe
+            while len(cls.__local_cache) > settings.HANDBOOK_LOCAL_CACHE_SIZE:
+                cls.__local_cache.popitem(last=False)
 
         return dataframe
+
+    @classmethod
+    def invalidate(cls, model: models.Model) -> None:
+        """
+        Сброс кеша справочника повышением его версии
+
+        Версия повышается после коммита, иначе другой воркер успеет
+        закешировать справочник без незакоммиченных изменений
+
+        Args:
+            model (models.Model): модель справочника
+        """
+
+        if not cls.is_cache_enabled():
+            return
+
+        version_key = cls.__get_version_key(model)
+
+        def increment_version():
+            cache.add(version_key, time.time_ns(), None)
+            cache.incr(version_key)
+
+        transaction.on_commit(increment_version)
+
+    @classmethod
+    def is_cache_enabled(cls) -> bool:
+        """
+        Кешируются ли справочники: кеш включен в настройках и общий для процессов
+
+        Returns:
+            bool: кеш включен
+        """
+
+        return (
+            settings.HANDBOOK_CACHE
+            and settings.CACHES["default"]["BACKEND"] not in cls.process_cache_backends
+        )
+
+    @classmethod
+    def __fetch_handbook(cls, model: models.Model) -> pl.DataFrame:
+        """
+        Выгрузка справочника из БД
+
+        Args:
+            model (models.Model): модель справочника
+
+        Returns:
+            pl.Dataframe: датафрейм со справочником
+        """
+
+        # в name отдается ключ наименования, по нему идет сопоставление с файлами
+        query = "SELECT id, name_key AS name FROM {table}".format(
+            table=connection.ops.quote_name(model._meta.db_table)
+        )
+
+        return ConnectorManager.get_polars_data(query, cls.schema)
+
+    @classmethod
+    def __get_version(cls, model: models.Model) -> int:
+        """
+        Текущая версия справочника
+
+        Args:
+            model (models.Model): модель справочника
+
+        Returns:
+            int: версия
+        """
+
+        version_key = cls.__get_version_key(model)
+        version = cache.get(version_key)
+        if version is None:
+            # версия с отметкой времени, чтобы после потери ключа в redis
+            # не вернуться к номеру, под которым в памяти лежит старый снимок
+            cache.add(version_key, time.time_ns(), None)
+            version = cache.get(version_key)
+
+        return version
+
+    @staticmethod
+    def __get_version_key(model: models.Model) -> str:
+        return f"handbook:{model._meta.label_lower}:version"
+
+    @staticmethod
+    def __get_snapshot_key(label: str, version: int) -> str:
+        return f"handbook:{label}:{version}"
+
+
+class ProductionProductDataLoader:
+    """
+    Класс для выгрузки данных по "Выработке продукции"
+    """
+
+    schema = {
+        "id": pl.Int64,
+        "date": pl.Date,
+        "indicator_id": pl.Int64,
+        "installation_id": pl.Int64,
+        "type_plan_id": pl.Int64,
+        "value": pl.Float64,
+    }
+
+    @classmethod
+    def get_production_product(cls) -> pl.DataFrame:
+        """
+        Выгрузка текущих данных по выработке продукции
+
+        Returns:
+            pl.Dataframe: датафрейм с данными из БД
+        """
+
+        queryset = GSProductionProduct.objects.values(*cls.schema.keys())
+
+        return pl.from_dicts(list(queryset), schema=cls.schema)
@@ -1,3 +1,5 @@
+from common.normalization import NameNormalizer
+from common.serializers import FileRetrieveSerializer
 from gas_service.models import (
     GSIndicator,
     GSInstallation,
@@ -7,7 +9,32 @@ from gas_service.models import (
 from rest_framework import serializers
 
 
-class GSIndicatorSerializer(serializers.ModelSerializer):
+class GSHandbookSerializer(serializers.ModelSerializer):
+    """
+    Общий сериалайзер справочников
+    """
+
+    def validate_name(self, value: str) -> str:
+        """
+        Наименование не должно совпадать с существующим с точностью
+        до регистра и пробелов
+        """
+
+        queryset = self.Meta.model.objects.filter(
+            name_key=NameNormalizer.normalize(value)
+        )
+        if self.instance is not None:
+            queryset = queryset.exclude(pk=self.instance.pk)
+
+        if queryset.exists():
+            raise serializers.ValidationError(
+                "Такое наименование уже есть в справочнике"
+            )
+
+        return value
+
+
+class GSIndicatorSerializer(GSHandbookSerializer):
     """
     Сериалайзер для справочника "Показатель"
     """
@@ -17,7 +44,7 @@ class GSIndicatorSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "created_by"]
 
 
-class GSInstallationSerializer(serializers.ModelSerializer):
+class GSInstallationSerializer(GSHandbookSerializer):
     """
     Сериалайзер для справочника "Установка"
     """
@@ -27,7 +54,7 @@ class GSInstallationSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "created_by"]
 
 
-class GSTypePlanSerializer(serializers.ModelSerializer):
+class GSTypePlanSerializer(GSHandbookSerializer):
     """
     Сериалайзер для справочника "Тип плана"
     """
@@ -62,3 +89,14 @@ class GSProductionProductSerializer(serializers.ModelSerializer):
             "value",
             "created_by",
         ]
+
+
+class ImportProductionProductSerializer(FileRetrieveSerializer):
+    """
+    Сериалайзер импорта файла "Выработка продукции"
+    """
+
+    incremental = serializers.BooleanField(
+        default=False,
+        help_text="Записать только изменения вместо полной перезаливки",
+    )
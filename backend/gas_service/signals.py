@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from gas_service.models import GSIndicator, GSInstallation, GSTypePlan
+from gas_service.queries import HandbookLoader
+
+
+@receiver([post_save, post_delete], sender=GSIndicator)
+@receiver([post_save, post_delete], sender=GSInstallation)
+@receiver([post_save, post_delete], sender=GSTypePlan)
+def invalidate_handbook(sender, **kwargs):
+    """
+    Сброс кеша справочника при изменении его записей
+    """
+
+    HandbookLoader.invalidate(sender)
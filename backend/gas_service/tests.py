@@ -1,3 +1,282 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import date, datetime
+from pathlib import Path
+from unittest import skipUnless
+from unittest.mock import patch
 
-# Create your tests here.
+import polars as pl
+from common.creator import UpdateStrategy
+from django.db import connection
+from django.test import TestCase, override_settings
+from gas_service.benchmark import SyntheticWorkbook
+from gas_service.loaders.handbook import IndicatorLoader
+from gas_service.loaders.production_product import ProductionProductLoader
+from gas_service.models import (
+    GSIndicator,
+    GSInstallation,
+    GSProductionProduct,
+    GSTypePlan,
+)
+from gas_service.parsers.config import (
+    ProductionProductColumns,
+    ProductionProductColumnsLoadDB,
+    ProductionProductExcelConfig,
+)
+from gas_service.parsers.production_product import ProductionProductParcer
+from openpyxl import load_workbook
+
+
+class ProductionProductParcerTest(TestCase):
+    """
+    Разбор файла "Выработка продукции"
+    """
+
+    def setUp(self):
+        self.workdir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.workdir, ignore_errors=True)
+        settings_override = override_settings(
+            PARSE_CACHE_DIR=str(self.workdir / "parse_cache")
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.generator = SyntheticWorkbook(rows_per_sheet=4, installations=2)
+        for model, names in (
+            (GSIndicator, self.generator.get_indicators()),
+            (GSInstallation, self.generator.get_installations()),
+            (GSTypePlan, self.generator.types_plan),
+        ):
+            for name in names:
+                model.objects.create(name=name)
+
+    def get_file(self, value=None) -> Path:
+        """
+        Файл, в котором у первого показателя первого листа в "ФАКТ-СГ" записано value
+        """
+
+        path = self.generator.write_production_product(self.workdir / "file.xlsx")
+        if value is not None:
+            workbook = load_workbook(path)
+            # после шапки идет строка первой установки, за ней ее первый показатель
+            workbook["01"].cell(
+                row=ProductionProductExcelConfig.START_ROW + 3,
+                column=ProductionProductColumns.DIFFERENCE_FACT_NETWORK_GRAPH.value + 1,
+                value=value,
+            )
+            workbook.save(path)
+        return path
+
+    def test_valid_file(self):
+        parser = ProductionProductParcer(self.get_file(), None)
+
+        self.assertTrue(parser._validate().is_empty())
+        self.assertEqual(parser.rows_count["installations"], 2 * 12)
+        self.assertEqual(parser.rows_count["indicators"], 4 * 12)
+
+        records = parser.create_records()
+        self.assertEqual(records.height, 4 * 12 * len(self.generator.types_plan))
+        self.assertEqual(
+            records[ProductionProductColumnsLoadDB.VALUE.name].dtype, pl.Float64
+        )
+        self.assertEqual(
+            records[ProductionProductColumnsLoadDB.VALUE.name].null_count(), 0
+        )
+
+    def test_text_value_in_indicator_row(self):
+        parser = ProductionProductParcer(self.get_file("н/д"), None)
+
+        report = parser._validate()
+        # строка с текстом остается показателем, а не становится установкой
+        self.assertEqual(parser.rows_count["installations"], 2 * 12)
+        self.assertEqual(parser.rows_count["indicators"], 4 * 12)
+        self.assertEqual(report.height, 1)
+        self.assertEqual(report["column"][0], "Показатель")
+        self.assertIn("должны быть числами", report["text"][0])
+
+    def test_incomplete_parse_cache(self):
+        path = self.get_file()
+        ProductionProductParcer(path, None)
+
+        # запись кеша без шапок листов, например удаляемая при вытеснении
+        for frame in (self.workdir / "parse_cache").glob("*/headers.arrow"):
+            frame.unlink()
+
+        parser = ProductionProductParcer(path, None)
+        self.assertEqual(parser.headers.height, 12 * len(self.generator.types_plan))
+        self.assertTrue(parser._validate().is_empty())
+        # неполная запись переписана заново
+        self.assertEqual(
+            len(list((self.workdir / "parse_cache").glob("*/headers.arrow"))), 1
+        )
+
+    def test_parse_cache_after_new_year(self):
+        path = self.get_file()
+        year = datetime.now().year
+        ProductionProductParcer(path, None)
+
+        class NextYear(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime(year + 1, 1, 10)
+
+        # кеш разбора прошлого года не должен вернуть листы с его датами
+        with patch("gas_service.parsers.production_product.datetime", NextYear):
+            parser = ProductionProductParcer(path, None)
+
+        self.assertEqual(
+            parser.headers["DATE"].dt.year().unique().to_list(), [year + 1]
+        )
+        self.assertEqual(
+            parser._df.select(pl.col("DATE").dt.year().unique())
+            .collect()
+            .to_series()
+            .to_list(),
+            [year + 1],
+        )
+
+
+class HandbookCreatorTest(TestCase):
+    """
+    Запись наименований в справочник
+    """
+
+    def test_upsert_instances(self):
+        GSIndicator.objects.create(name="Газ")
+        data = pl.DataFrame(
+            {"name": ["газ ", "Нефть", " нефть", "Конденсат"], "created_by_id": None},
+            schema={"name": pl.String, "created_by_id": pl.Int64},
+        )
+
+        self.assertEqual(IndicatorLoader().upsert_instances(data), 2)
+        self.assertEqual(IndicatorLoader().upsert_instances(data), 0)
+        self.assertEqual(
+            sorted(GSIndicator.objects.values_list("name_key", flat=True)),
+            ["газ", "конденсат", "нефть"],
+        )
+
+
+@skipUnless(
+    connection.vendor == "postgresql", "COPY и UPDATE ... FROM только на postgres"
+)
+class ProductionProductLoaderTest(TestCase):
+    """
+    Запись "Выработки продукции" в БД мимо инстансов моделей
+    """
+
+    def setUp(self):
+        self.indicator = GSIndicator.objects.create(name="Газ")
+        self.installation = GSInstallation.objects.create(name="Установка")
+        self.types_plan = [
+            GSTypePlan.objects.create(name=name) for name in ("ПП М03", "ФАКТ", "СГ")
+        ]
+        self.rows = [
+            GSProductionProduct.objects.create(
+                date=date(2026, 1, 1),
+                indicator=self.indicator,
+                installation=self.installation,
+                type_plan=type_plan,
+                value=value,
+            )
+            for type_plan, value in zip(self.types_plan, (1.0, 2.0, 3.0))
+        ]
+
+    def get_values(self) -> dict[int, float | None]:
+        return dict(GSProductionProduct.objects.values_list("id", "value"))
+
+    def test_update_instances_to_db(self):
+        for strategy in (UpdateStrategy.COPY, UpdateStrategy.VALUES):
+            with self.subTest(strategy=strategy):
+                loader = ProductionProductLoader()
+                loader.update_strategy = strategy
+                # null уходит в COPY как '\N' и должен записаться как NULL
+                loader.update_instances_to_db(
+                    GSProductionProduct,
+                    pl.DataFrame(
+                        {
+                            "id": [self.rows[0].id, self.rows[1].id],
+                            "value": [10.5, None],
+                        },
+                        schema={"id": pl.Int64, "value": pl.Float64},
+                    ),
+                    ["value"],
+                    batch_size=1,
+                )
+
+                self.assertEqual(
+                    self.get_values(),
+                    {
+                        self.rows[0].id: 10.5,
+                        self.rows[1].id: None,
+                        self.rows[2].id: 3.0,
+                    },
+                )
+                for row in self.rows:
+                    row.save(update_fields=["value"])
+
+    def test_delete_instances_to_db(self):
+        keys = pl.DataFrame(
+            {
+                "date": [date(2026, 1, 1), date(2026, 1, 1), date(2026, 2, 1)],
+                "indicator_id": [self.indicator.id] * 3,
+                "installation_id": [self.installation.id] * 3,
+                "type_plan_id": [
+                    self.types_plan[0].id,
+                    self.types_plan[2].id,
+                    self.types_plan[0].id,
+                ],
+            }
+        )
+
+        deleted = ProductionProductLoader().delete_instances_to_db(
+            GSProductionProduct, keys, batch_size=1
+        )
+
+        self.assertEqual(deleted, 2)
+        self.assertEqual(list(self.get_values()), [self.rows[1].id])
+
+    def test_save_delta_to_db(self):
+        loader = ProductionProductLoader()
+        data = pl.DataFrame(
+            {
+                "DATE": [datetime(2026, 1, 1)] * 2 + [datetime(2026, 2, 1)],
+                "INDICATOR_ID": [self.indicator.id] * 3,
+                "INSTALLATION_ID": [self.installation.id] * 3,
+                "TYPE_PLAN_ID": [
+                    self.types_plan[0].id,
+                    self.types_plan[1].id,
+                    self.types_plan[0].id,
+                ],
+                "VALUE": [1.0, None, 4.0],
+            }
+        )
+        current = pl.DataFrame(
+            list(
+                GSProductionProduct.objects.values(
+                    "id", *loader.key_columns, *loader.value_columns
+                )
+            )
+        )
+
+        delta = loader.create_delta(data, current)
+        loader.save_delta_to_db(GSProductionProduct, delta, loader.value_columns)
+
+        self.assertEqual(
+            delta.get_statistic(), {"created": 1, "updated": 1, "deleted": 1}
+        )
+        self.assertEqual(
+            sorted(
+                GSProductionProduct.objects.values_list(
+                    "date", "type_plan_id", "value"
+                ),
+                key=str,
+            ),
+            sorted(
+                [
+                    (date(2026, 1, 1), self.types_plan[0].id, 1.0),
+                    (date(2026, 1, 1), self.types_plan[1].id, None),
+                    (date(2026, 2, 1), self.types_plan[0].id, 4.0),
+                ],
+                key=str,
+            ),
+        )
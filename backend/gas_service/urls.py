@@ -14,6 +14,7 @@ from gas_service.views import (
     GSTypePlanSingleView,
     ImportHandbookView,
     ImportProductionProductView,
+    ValidateProductionProductView,
 )
 
 app_name = "gas_service"
@@ -55,4 +56,9 @@ urlpatterns = [
         ImportProductionProductView.as_view(),
         name="import-productionproduct",
     ),
+    path(
+        "import/productionproduct/validate",
+        ValidateProductionProductView.as_view(),
+        name="validate-productionproduct",
+    ),
 ]
@@ -1,7 +1,5 @@
-from typing import Optional
-
 import polars as pl
-from common.validation_errors import PresentationDataForError
+from common.validation_errors import ErrorReport
 from gas_service.exceptions import EmptyFile
 
 
@@ -11,57 +9,105 @@ class ProductionProductValidator:
     """
 
     def __init__(self) -> None:
-        self.errors: list = []
+        self.errors: list[pl.DataFrame] = []
 
     def validate_input_fields(
         self,
         data: pl.DataFrame,
-        loader: pl.DataFrame,
         column_identificator: str,
         name_handbook_for_user: str,
-    ) -> list[Optional[PresentationDataForError]]:
+    ) -> list[pl.DataFrame]:
         """
         Проверка входных данных на соответсвие справочникам
 
+        Ошибки собираются по наименованию с количеством повторений в файле
+
         Args:
-            data (pl.DataFrame): данные из файла
-            loader (pl.DataFrame): выгруженный справочник
+            data (pl.DataFrame): наименования из файла с id из справочника
+            column_identificator (str): колонка с наименованиями
             name_handbook_for_user (str): наименование справочника
 
         Returns:
-            err_list (Optional[list[PresentationDataForError]]): перечень ошибок для пользователя
+            list[pl.DataFrame]: ошибки для пользователя по проверкам
         """
 
-        merged_data = data.join(
-            loader,
-            left_on=column_identificator,
-            right_on="name",
-            how="left",
+        self.errors.append(
+            data.filter(pl.col("id").is_null())
+            .group_by(column_identificator)
+            .agg(pl.len().alias("count"))
+            .select(
+                pl.format(
+                    "Наименование '{}' отсутвует в справочнике '{}'",
+                    pl.col(column_identificator),
+                    pl.lit(name_handbook_for_user),
+                ).alias("text"),
+                pl.lit("Ошибка").alias("type"),
+                pl.lit(name_handbook_for_user).alias("column"),
+                pl.lit("").alias("name_object"),
+                pl.col("count"),
+            )
         )
 
-        invalid_data = merged_data.filter(pl.col("id").is_null())[column_identificator]
-        for value in invalid_data:
-            self.errors.append(
-                PresentationDataForError(
-                    type="Ошибка",
-                    column=name_handbook_for_user,
-                    text=f"Наименование '{value}' отсутвует в справочнике '{name_handbook_for_user}'",
-                    name_object="",
-                )
+        return self.errors
+
+    def validate_values(
+        self,
+        data: pl.DataFrame,
+        column_identificator: str,
+        name_handbook_for_user: str,
+    ) -> list[pl.DataFrame]:
+        """
+        Проверка, что значения в строках показателей - числа
+
+        Args:
+            data (pl.DataFrame): наименования строк с нечисловыми значениями
+            column_identificator (str): колонка с наименованиями
+            name_handbook_for_user (str): наименование справочника
+
+        Returns:
+            list[pl.DataFrame]: ошибки для пользователя по проверкам
+        """
+
+        self.errors.append(
+            data.group_by(column_identificator)
+            .agg(pl.len().alias("count"))
+            .select(
+                pl.format(
+                    "Значения в строке '{}' должны быть числами",
+                    pl.col(column_identificator),
+                ).alias("text"),
+                pl.lit("Ошибка").alias("type"),
+                pl.lit(name_handbook_for_user).alias("column"),
+                pl.lit("").alias("name_object"),
+                pl.col("count"),
             )
+        )
 
         return self.errors
 
+    def get_report(self) -> pl.DataFrame:
+        """
+        Все ошибки одним отчетом
+
+        Returns:
+            pl.DataFrame: отчет об ошибках
+        """
+
+        return pl.concat([ErrorReport.empty(), *self.errors])
+
     @staticmethod
-    def is_empty_file(df: pl.DataFrame) -> None:
+    def is_empty_file(df: pl.DataFrame | pl.LazyFrame) -> None:
         """
         Валидация на не пустой файл
 
         Args:
-            dataframe (pl.DataFrame): данные
+            dataframe (pl.DataFrame | pl.LazyFrame): данные
         Raises:
             EmptyFile: в загруженном файле нет данных
         """
 
+        if isinstance(df, pl.LazyFrame):
+            df = df.head(1).collect()
+
         if df.is_empty():
             raise EmptyFile
@@ -1,14 +1,13 @@
-import os
 from dataclasses import asdict
 
 from celery import current_task, states
+from common.profiling import ImportProfiler
 from common.response import celery_response
 from common.serializers import CeleryTaskIdSerializer, FileRetrieveSerializer
+from common.upload import SpoolUploadedFile, SpoolUploadMixin, remove_spool_file
 from common.validation import FileImportValidator
-from common.validation_errors import DataForResponse
+from common.validation_errors import DataForResponse, ErrorReport
 from common.views import CreatedUserMixin, StaffPermission
-from django.core.files.storage import FileSystemStorage
-from django.core.files.uploadedfile import InMemoryUploadedFile
 from django.db import transaction
 from drf_spectacular.utils import OpenApiResponse, extend_schema
 from gas_service.filters import GSProductionProductListFilter
@@ -26,11 +25,13 @@ from gas_service.models import (
 )
 from gas_service.parsers.handbook import HandbookParcer
 from gas_service.parsers.production_product import ProductionProductParcer
+from gas_service.queries import ProductionProductDataLoader
 from gas_service.serializers import (
     GSIndicatorSerializer,
     GSInstallationSerializer,
     GSProductionProductSerializer,
     GSTypePlanSerializer,
+    ImportProductionProductSerializer,
 )
 from rest_framework import parsers
 from rest_framework.generics import (
@@ -177,7 +178,7 @@ class GSProductionProductSingleView(RetrieveUpdateDestroyAPIView):
     permission_classes = [StaffPermission]
 
 
-class ImportHandbookView(GenericAPIView):
+class ImportHandbookView(SpoolUploadMixin, GenericAPIView):
     """
     Загрузка справочников (асинхронно)
     """
@@ -203,50 +204,63 @@ class ImportHandbookView(GenericAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        file_loaded: InMemoryUploadedFile = serializer.validated_data["file"]
-        f = FileSystemStorage(location="files")
-        name_file = f.save(file_loaded.name, file_loaded.file)
+        # файл уже записан в спул обработчиком загрузки
+        file_loaded: SpoolUploadedFile = serializer.validated_data["file"]
 
         result = self.load_async_handbook.apply_async(
-            (str(f.path(name_file)), request.user.pk)
+            (file_loaded.path, request.user.pk, file_loaded.content_hash)
         )
+        self.keep_spool_file(file_loaded)
 
         return celery_response(result.id)
 
     @staticmethod
     @celery_app.task
-    def load_async_handbook(path: str, user_id: int):
+    def load_async_handbook(path: str, user_id: int, content_hash: str = None):
         """
         Загрузка справочников"
 
         Args:
             file_content (BytesIO): файл
             user_id (int): ID пользователя
+            content_hash (str): sha256 файла, посчитанный при загрузке
         """
 
-        parser = HandbookParcer(path, user_id)
-        (
-            indicator_to_create,
-            installation_to_create,
-            type_plan_to_create,
-        ) = parser.create_records()
+        try:
+            with ImportProfiler(current_task.request.id) as profiler:
+                parser = HandbookParcer(path, user_id, content_hash)
+                indicators, installations, types_plan = parser.get_records()
+
+                with transaction.atomic():
+                    # сколько наименований добавлено в каждый справочник
+                    created = {
+                        "indicators": IndicatorLoader().upsert_instances(indicators),
+                        "installations": InstallationLoader().upsert_instances(
+                            installations
+                        ),
+                        "types_plan": TypePlanLoader().upsert_instances(types_plan),
+                    }
+        finally:
+            remove_spool_file(path)
 
-        with transaction.atomic():
-            loader = IndicatorLoader()
-            loader.create_instances(indicator_to_create)
-            loader = InstallationLoader()
-            loader.create_instances(installation_to_create)
-            loader = TypePlanLoader()
-            loader.create_instances(type_plan_to_create)
-            os.remove(path)
+        return current_task.update_state(
+            state=states.SUCCESS,
+            meta=asdict(
+                DataForResponse(
+                    text="Справочники загружены",
+                    statistic=created,
+                    profile=profiler.as_list(),
+                )
+            ),
+        )
 
 
-class ImportProductionProductView(GenericAPIView):
+class ImportProductionProductView(SpoolUploadMixin, GenericAPIView):
     """
     Импорт файла "Выработка продукции" (асинхронно)
     """
 
-    serializer_class = FileRetrieveSerializer
+    serializer_class = ImportProductionProductSerializer
     parser_classes = (
         parsers.FormParser,
         parsers.MultiPartParser,
@@ -267,42 +281,56 @@ class ImportProductionProductView(GenericAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        file_loaded: InMemoryUploadedFile = serializer.validated_data["file"]
-        f = FileSystemStorage(location="files")
-        name_file = f.save(file_loaded.name, file_loaded.file)
+        # файл уже записан в спул обработчиком загрузки
+        file_loaded: SpoolUploadedFile = serializer.validated_data["file"]
 
         result = self.load_async_production_product.apply_async(
-            (str(f.path(name_file)), request.user.pk)
+            (
+                file_loaded.path,
+                request.user.pk,
+                serializer.validated_data["incremental"],
+                file_loaded.content_hash,
+            )
         )
+        self.keep_spool_file(file_loaded)
 
         return celery_response(result.id)
 
     @staticmethod
     @celery_app.task
-    def load_async_production_product(path: str, user_id: int):
+    def load_async_production_product(
+        path: str, user_id: int, incremental: bool = False, content_hash: str = None
+    ):
         """
         Импорт файла "Выработка продукции"
 
         Args:
             file_content (BytesIO): файл
             user_id (int): ID пользователя
+            incremental (bool): записать только изменения, а не перезаливать таблицу
+            content_hash (str): sha256 файла, посчитанный при загрузке
         """
 
-        parser = ProductionProductParcer(path, user_id)
-        errors = parser._validate()
+        try:
+            with ImportProfiler(current_task.request.id) as profiler:
+                parser = ProductionProductParcer(path, user_id, content_hash)
+                errors = parser._validate()
 
-        if not errors:
-            loader = ProductionProductLoader()
-            instanses_to_create = loader.create_instances(parser.create_records())
-            with transaction.atomic():
-                GSProductionProduct.objects.all().delete()
-                loader.save_instances_to_db(GSProductionProduct, instanses_to_create)
-            os.remove(path)
+                if errors.is_empty():
+                    statistic = ImportProductionProductView.__save_records(
+                        parser, incremental, profiler
+                    )
+        finally:
+            remove_spool_file(path)
+
+        if errors.is_empty():
             output_response = asdict(
                 DataForResponse(
                     warning=False,
                     text="Файл загружен",
                     log_errors=[],
+                    statistic=statistic,
+                    profile=profiler.as_list(),
                 )
             )
             return current_task.update_state(
@@ -314,10 +342,142 @@ class ImportProductionProductView(GenericAPIView):
             DataForResponse(
                 warning=True,
                 text="При загрузке обнаружены ошибки, исправьте их и загрузите файл снова",
-                log_errors=errors,
+                log_errors=ErrorReport.get_top(errors),
+                errors_count=len(errors),
+                log_file=ErrorReport.save(errors, current_task.request.id),
+                profile=profiler.as_list(),
             )
         )
         return current_task.update_state(
             state=states.SUCCESS,
             meta=output_response,
         )
+
+    @staticmethod
+    def __save_records(
+        parser: ProductionProductParcer, incremental: bool, profiler: ImportProfiler
+    ) -> dict[str, int]:
+        """
+        Запись разобранного файла в БД
+
+        Args:
+            parser (ProductionProductParcer): парсер без ошибок валидации
+            incremental (bool): записать только изменения, а не перезаливать таблицу
+            profiler (ImportProfiler): замеры этапов импорта
+
+        Returns:
+            dict[str, int]: сколько строк добавлено, изменено и удалено
+        """
+
+        loader = ProductionProductLoader()
+        records = parser.create_records()
+        with transaction.atomic():
+            if incremental:
+                delta = loader.create_delta(
+                    records, ProductionProductDataLoader.get_production_product()
+                )
+                loader.save_delta_to_db(
+                    GSProductionProduct, delta, loader.value_columns
+                )
+                return delta.get_statistic()
+
+            instanses_to_create = loader.create_instances(records)
+            with profiler.stage("GSProductionProduct.delete") as stage:
+                deleted, _ = GSProductionProduct.objects.all().delete()
+                stage.rows_out = deleted
+            loader.save_instances_to_db(GSProductionProduct, instanses_to_create)
+            return {
+                "created": len(instanses_to_create),
+                "updated": 0,
+                "deleted": deleted,
+            }
+
+
+class ValidateProductionProductView(SpoolUploadMixin, GenericAPIView):
+    """
+    Проверка файла "Выработка продукции" без загрузки в БД (асинхронно)
+    """
+
+    serializer_class = FileRetrieveSerializer
+    parser_classes = (
+        parsers.FormParser,
+        parsers.MultiPartParser,
+        parsers.FileUploadParser,
+    )
+    permission_classes = [StaffPermission]
+
+    @extend_schema(
+        summary="Проверка файла Выработка продукции",
+        responses={
+            200: CeleryTaskIdSerializer,
+            404: OpenApiResponse(description="Произошла ошибка при загрузке файла"),
+        },
+    )
+    @FileImportValidator.does_file_exists
+    @FileImportValidator.is_file_valid
+    def post(self, request: Request, format=None):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # файл уже записан в спул обработчиком загрузки
+        file_loaded: SpoolUploadedFile = serializer.validated_data["file"]
+
+        result = self.validate_async_production_product.apply_async(
+            (file_loaded.path, request.user.pk, file_loaded.content_hash)
+        )
+        self.keep_spool_file(file_loaded)
+
+        return celery_response(result.id)
+
+    @staticmethod
+    @celery_app.task
+    def validate_async_production_product(
+        path: str, user_id: int, content_hash: str = None
+    ):
+        """
+        Проверка файла "Выработка продукции"
+
+        Файл только разбирается и сверяется со справочниками (из кеша),
+        в БД ничего не пишется
+
+        Args:
+            file_content (BytesIO): файл
+            user_id (int): ID пользователя
+            content_hash (str): sha256 файла, посчитанный при загрузке
+        """
+
+        try:
+            with ImportProfiler(current_task.request.id) as profiler:
+                parser = ProductionProductParcer(path, user_id, content_hash)
+                errors = parser._validate()
+        finally:
+            remove_spool_file(path)
+
+        if errors.is_empty():
+            output_response = asdict(
+                DataForResponse(
+                    warning=False,
+                    text="Ошибок не обнаружено, файл можно загружать",
+                    log_errors=[],
+                    statistic=parser.rows_count,
+                    errors_count=0,
+                    profile=profiler.as_list(),
+                )
+            )
+        else:
+            output_response = asdict(
+                DataForResponse(
+                    warning=True,
+                    text="В файле обнаружены ошибки, исправьте их перед загрузкой",
+                    log_errors=ErrorReport.get_top(errors),
+                    statistic=parser.rows_count,
+                    errors_count=len(errors),
+                    log_file=ErrorReport.save(errors, current_task.request.id),
+                    profile=profiler.as_list(),
+                )
+            )
+
+        return current_task.update_state(
+            state=states.SUCCESS,
+            meta=output_response,
+        )
@@ -0,0 +1,406 @@
+import tempfile
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+import numpy as np
+import polars as pl
+from common.benchmark import Benchmark, BenchmarkResult
+from common.creator import DefaultCreator
+from common.db_connector import ConnectorManager
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.db import transaction
+from django.test.utils import override_settings
+from wells.excel_templates.temporary_period import TemporaryPeriodTemplate
+from wells.export.config import SheetExcelData
+from wells.export.temporary_period import ExportCalculationTemporaryPeriod
+from wells.models import (
+    CharacteristicBaseFund,
+    District,
+    Field,
+    FundList,
+    Pad,
+    Well,
+    WellsBaseFund,
+    WellsStatus,
+    WellsStatuses,
+)
+from wells.queries import CalculationTemporaryPeriodLoader
+
+
+class SyntheticFundCreator(DefaultCreator):
+    """
+    Запись сгенерированного фонда, на postgres через COPY
+    """
+
+    use_copy = True
+
+
+@dataclass
+class SyntheticFund:
+    """
+    Генератор фонда скважин ИНК: участки, месторождения, кусты, скважины,
+    постоянные характеристики и помесячные состояния
+
+    Состояние скважины меняется от месяца к месяцу как цепь Маркова: с
+    вероятностью stay_probability остается прежним, иначе выбирается заново
+    по весам status_weights. Сроки временной приостановки раскладываются так,
+    чтобы в каждый лист отчета попадали скважины
+
+    Attributes:
+        wells (int): количество скважин
+        months (int): количество помесячных состояний каждой скважины
+        end_date (date): дата последнего состояния
+        seed (int): зерно генератора
+        prefix (str): префикс наименований, по нему находятся сгенерированные данные
+    """
+
+    wells: int
+    months: int
+    end_date: Optional[date] = None
+    seed: int = 0
+    prefix: str = "synthetic"
+    wells_per_pad: int = 20
+    fields: int = 6
+    districts: int = 3
+    stay_probability: float = 0.85
+    # состояние (WellsStatuses) и его доля в фонде
+    status_weights = {
+        "В работе": 0.55,
+        "Простой": 0.10,
+        "В ож.освоения": 0.08,
+        "Бездействие текущего года": 0.10,
+        "Бездействие прошлых лет": 0.10,
+        "Бездействующая": 0.05,
+        "Консервация": 0.02,
+    }
+    funds = (FundList.ND, FundList.GD, FundList.VZ)
+
+    def __post_init__(self) -> None:
+        if self.end_date is None:
+            self.end_date = date.today().replace(day=1)
+        self.random = np.random.default_rng(self.seed)
+
+    def exists(self) -> bool:
+        return District.objects.filter(name__startswith=self.prefix).exists()
+
+    @transaction.atomic
+    def clear(self) -> None:
+        """
+        Удаление сгенерированных данных, справочники статусов остаются
+        """
+
+        districts = District.objects.filter(name__startswith=self.prefix)
+        # состояния и характеристики удаляются каскадом вместе со скважинами
+        Well.objects.filter(wellpad__license__in=districts).delete()
+        Pad.objects.filter(license__in=districts).delete()
+        Field.objects.filter(name__startswith=self.prefix).delete()
+        districts.delete()
+
+    @transaction.atomic
+    def fill(self) -> dict[str, int]:
+        """
+        Заполнение фонда
+
+        Returns:
+            dict[str, int]: количество созданных строк по моделям
+        """
+
+        statuses = self.__get_statuses()
+        wells = self.__create_wells()
+        history = self.__create_history(wells, statuses)
+        characteristics = self.__create_characteristics(history)
+
+        creator = SyntheticFundCreator()
+        creator.save_instances_to_db(WellsBaseFund, history.drop("state"))
+        creator.save_instances_to_db(CharacteristicBaseFund, characteristics)
+
+        return {
+            "wells": len(wells),
+            "wells_base_fund": len(history),
+            "characteristic_base_fund": len(characteristics),
+        }
+
+    def get_dates(self) -> list[date]:
+        return [
+            self.end_date - relativedelta(months=month)
+            for month in reversed(range(self.months))
+        ]
+
+    def __get_statuses(self) -> pl.DataFrame:
+        """
+        Статусы фонда для каждого состояния, недостающие создаются
+
+        Returns:
+            pl.DataFrame: id статуса, номер состояния в status_weights и фонд
+        """
+
+        rows = []
+        for number, name in enumerate(self.status_weights):
+            statuses, _ = WellsStatuses.objects.get_or_create(name=name)
+            for fund in self.funds:
+                status, _ = WellsStatus.objects.get_or_create(
+                    name=f"{name} {fund.label}",
+                    fund=fund.value,
+                    defaults={"status": statuses},
+                )
+                rows.append((status.pk, number, fund.value))
+
+        return pl.DataFrame(rows, schema=["status_id", "state", "fund"], orient="row")
+
+    def __create_wells(self) -> list[int]:
+        """
+        Участки, месторождения, кусты и скважины
+
+        Returns:
+            list[int]: id скважин
+        """
+
+        districts = District.objects.bulk_create(
+            [
+                District(name=f"{self.prefix} {number}", short_name=f"УН-{number}")
+                for number in range(self.districts)
+            ]
+        )
+        fields = Field.objects.bulk_create(
+            [
+                Field(name=f"{self.prefix} {number}", short_name=f"М-{number}")
+                for number in range(self.fields)
+            ]
+        )
+        pads = Pad.objects.bulk_create(
+            [
+                Pad(
+                    name=f"{self.prefix} {number}",
+                    field=fields[number % self.fields],
+                    license=districts[number % self.districts],
+                )
+                for number in range(-(-self.wells // self.wells_per_pad))
+            ]
+        )
+        wells = Well.objects.bulk_create(
+            [
+                # номер скважины в отчете - часть имени после "_"
+                Well(
+                    name=f"{self.prefix}_{number}",
+                    wellpad=pads[number // self.wells_per_pad],
+                )
+                for number in range(self.wells)
+            ],
+            batch_size=5000,
+        )
+        return [well.pk for well in wells]
+
+    def __create_history(
+        self, wells: list[int], statuses: pl.DataFrame
+    ) -> pl.DataFrame:
+        """
+        Помесячные состояния скважин
+
+        Returns:
+            pl.DataFrame: строки WellsBaseFund
+        """
+
+        weights = np.array(list(self.status_weights.values()))
+        weights = weights / weights.sum()
+        funds = self.random.integers(0, len(self.funds), len(wells))
+
+        states = np.empty((self.months, len(wells)), dtype=np.int64)
+        states[0] = self.random.choice(len(weights), len(wells), p=weights)
+        for month in range(1, self.months):
+            changed = self.random.random(len(wells)) > self.stay_probability
+            states[month] = np.where(
+                changed,
+                self.random.choice(len(weights), len(wells), p=weights),
+                states[month - 1],
+            )
+
+        return (
+            pl.DataFrame(
+                {
+                    "date": pl.Series(self.get_dates()).gather(
+                        np.repeat(np.arange(self.months), len(wells))
+                    ),
+                    "well_id": np.tile(wells, self.months),
+                    "state": states.ravel(),
+                    "fund": np.tile(
+                        np.array([fund.value for fund in self.funds])[funds],
+                        self.months,
+                    ),
+                }
+            )
+            .join(statuses, on=["state", "fund"])
+            .select("date", "well_id", "status_id", "state")
+        )
+
+    def __create_characteristics(self, history: pl.DataFrame) -> pl.DataFrame:
+        """
+        Постоянные характеристики со сроками временной приостановки
+
+        Скважинам в бездействии и ожидании освоения сроки раскладываются
+        поровну под листы 2, 3, 4.1 и 4.2 и "продленные" в будущее, части
+        остальных скважин - срок в прошлом (лист "вывод_из_вр_приост")
+
+        Returns:
+            pl.DataFrame: строки CharacteristicBaseFund
+        """
+
+        idle_states = [
+            number
+            for number, name in enumerate(self.status_weights)
+            if name in CalculationTemporaryPeriodLoader.need_statuses
+        ]
+        latest = (
+            history.filter(pl.col("date") == self.end_date)
+            .sort("well_id")
+            .select("well_id", pl.col("state").is_in(idle_states).alias("is_idle"))
+        )
+
+        end_date = self.end_date
+        month = relativedelta(months=1)
+        # сроки: (начало, окончание) по варианту
+        variants = [
+            (end_date, end_date + 6 * month),  # лист 2: приостановлена в этом месяце
+            (end_date - 5 * month, end_date + month),  # лист 3: срок истекает
+            (end_date - 12 * month, end_date - month),  # лист 4.1: срок истек
+            (end_date - 2 * month, None),  # лист 4.2: срок не назначен
+            (end_date - 3 * month, end_date + 9 * month),  # срок идет
+        ]
+        variant = self.random.integers(0, len(variants), len(latest))
+        has_delay = latest["is_idle"].to_numpy() | (
+            self.random.random(len(latest)) < 0.3
+        )
+
+        delay_start = [
+            variants[number][0] if delay else None
+            for number, delay in zip(variant, has_delay)
+        ]
+        delay_period = [
+            variants[number][1] if delay else None
+            for number, delay in zip(variant, has_delay)
+        ]
+
+        return pl.DataFrame(
+            {
+                "well_id": latest["well_id"],
+                "delay_start": delay_start,
+                "delay_period": delay_period,
+                "building_end_date": [end_date - 60 * month] * len(latest),
+            },
+            schema={
+                "well_id": pl.Int64,
+                "delay_start": pl.Date,
+                "delay_period": pl.Date,
+                "building_end_date": pl.Date,
+            },
+        )
+
+
+class ExportBenchmark(Benchmark):
+    """
+    Замер этапов отчета по временным приостановкам: каждый из шести запросов,
+    перевод в numpy, запись каждого листа и сохранение книги
+
+    Отчет строится по данным, уже лежащим в БД (см. команду fill_wells_fund)
+    """
+
+    def run(self, input_date: Optional[date] = None) -> list[BenchmarkResult]:
+        """
+        Замер всех этапов
+
+        Args:
+            input_date (Optional[date]): дата для листа "вывод_из_вр_приост"
+
+        Returns:
+            list[BenchmarkResult]: замеры
+        """
+
+        scale = WellsBaseFund.objects.values("well").distinct().count()
+        queries = ExportCalculationTemporaryPeriod._get_sheet_queries(input_date)
+        last_date = ExportCalculationTemporaryPeriod._get_last_date()
+
+        result_wells: list[SheetExcelData] = []
+        for number, (name, query) in enumerate(queries, 1):
+            frame = self._measure(
+                f"query {number} ({name})",
+                scale,
+                lambda: ConnectorManager.get_raw_frame(query),
+            )
+            wells = self._measure(
+                f"to_numpy {number} ({name})", scale, lambda: frame.to_numpy()
+            )
+            result_wells.append(SheetExcelData(wells_loader=wells, sheet_name=name))
+
+        self._measure(
+            "queries concurrent",
+            scale,
+            lambda: ConnectorManager.get_raw_data_many([query for _, query in queries]),
+        )
+
+        frame = self._measure(
+            "query classified",
+            scale,
+            lambda: ConnectorManager.get_raw_frame(
+                CalculationTemporaryPeriodLoader.get_wells_classified()
+            ),
+        )
+        with override_settings(
+            CONNECTORX_PARTITION_NUM=settings.CONNECTORX_MAX_CONNECTIONS
+        ):
+            partitioned_query = ExportCalculationTemporaryPeriod._get_classified_query()
+        self._measure(
+            f"query classified partitioned ({settings.CONNECTORX_MAX_CONNECTIONS})",
+            scale,
+            lambda: ConnectorManager.get_raw_frame(partitioned_query),
+        )
+        self._measure(
+            "split classified",
+            scale,
+            lambda: ExportCalculationTemporaryPeriod._split_classified_wells(frame),
+        )
+
+        for number, wells in enumerate(result_wells, 1):
+            self._measure(
+                f"write_sheet {number} ({wells.sheet_name})",
+                scale,
+                lambda workbook: ExportCalculationTemporaryPeriod._write_sheet(
+                    workbook, wells, last_date, input_date
+                ),
+                setup=TemporaryPeriodTemplate,
+            )
+
+        self._measure(
+            "workbook.save",
+            scale,
+            self.__save,
+            setup=lambda: self.__get_filled_workbook(
+                result_wells, last_date, input_date
+            ),
+        )
+
+        return self.results
+
+    @staticmethod
+    def __get_filled_workbook(
+        result_wells: list[SheetExcelData], last_date: date, input_date: date
+    ):
+        """
+        Книга со всеми листами для замера сохранения
+        """
+
+        workbook = TemporaryPeriodTemplate()
+        for wells in result_wells:
+            ExportCalculationTemporaryPeriod._write_sheet(
+                workbook, wells, last_date, input_date
+            )
+        return workbook
+
+    @staticmethod
+    def __save(workbook) -> None:
+        """
+        Сохранение книги во временный файл
+        """
+
+        with tempfile.NamedTemporaryFile(suffix=".xlsx") as file:
+            workbook.save(file.name)
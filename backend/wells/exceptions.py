@@ -0,0 +1,9 @@
+class LatestStatusNotSupported(Exception):
+    """
+    Крайние состояния скважин поддерживаются триггерами только на postgres
+    """
+
+    def __init__(self, vendor: str) -> None:
+        super().__init__(
+            f"Крайние состояния скважин поддерживаются только на postgres, а не {vendor}"
+        )
@@ -1,16 +1,19 @@
+from dataclasses import replace
 from datetime import date
 
 import numpy as np
-from common.db_connector import ConnectorManager
+import polars as pl
+from common.db_connector import ConnectorManager, SqlQuery
 from common.excel_templates.custom_worksheet import CustomWorkSheet
 from dateutil.relativedelta import relativedelta
-from django.db.models import Max
+from django.conf import settings
+from django.db.models import Max, Min
 from openpyxl import Workbook
 from wells.excel_templates.config.description_sheets import TemporaryPeriodHeadersConfig
 from wells.excel_templates.config.temporary_period import WorkSheetHeaderTemporaryPeriod
 from wells.excel_templates.temporary_period import TemporaryPeriodTemplate
 from wells.export.config import SheetExcelData
-from wells.models import WellsBaseFund
+from wells.models import WellLatestStatus, WellsBaseFund
 from wells.queries import CalculationTemporaryPeriodLoader
 
 
@@ -19,6 +22,20 @@ class ExportCalculationTemporaryPeriod:
     Класс для выгрузки отчета по временным приостановкам из ФОНДа ИНК
     """
 
+    # листы скважин в бездействии строятся одним запросом с признаками листов
+    # (get_wells_classified), а не отдельным запросом на каждый лист
+    single_scan: bool = True
+    # номер листа в CalculationTemporaryPeriodLoader.get_wells и лист книги,
+    # скважины листов 4.1 и 4.2 пишутся на один лист "вр_приост_2"
+    wells_sheets: tuple[tuple[float, str], ...] = (
+        (1, "Фонд"),
+        (2, "вр_приост_1"),
+        (3, "вр_приост_продление"),
+        (4.1, "вр_приост_2"),
+        (4.2, "вр_приост_2"),
+    )
+    output_sheet: str = "вывод_из_вр_приост"
+
     @staticmethod
     def _write_data_in_excel(input_date: date) -> Workbook:
         """
@@ -30,41 +47,169 @@ class ExportCalculationTemporaryPeriod:
 
         workbook: Workbook = TemporaryPeriodTemplate()
 
-        results: dict[float, np.ndarray] = {}
-        for sheet_number in [1, 2, 3, 4.1, 4.2]:
-            results[sheet_number] = ConnectorManager.get_raw_data(
-                CalculationTemporaryPeriodLoader.get_wells(sheet_number)
+        result_wells = ExportCalculationTemporaryPeriod._get_sheets_data(input_date)
+
+        last_date = ExportCalculationTemporaryPeriod._get_last_date()
+        for wells in result_wells:
+            ExportCalculationTemporaryPeriod._write_sheet(
+                workbook, wells, last_date, input_date
             )
 
-        wells_output_temporary_period = ConnectorManager.get_raw_data(
-            CalculationTemporaryPeriodLoader.get_wells_output_temporary_period(
-                input_date
+        return workbook
+
+    @staticmethod
+    def _get_sheets_data(input_date: date) -> list[SheetExcelData]:
+        """
+        Данные для листов отчета, в порядке записи в эксель
+
+        Запросы независимы и выполняются параллельно,
+        отчет ждет только самый долгий из них
+
+        Args:
+            input_date (date): дата для формирования листа "вывод_из_вр_приост"
+
+        Returns:
+            list[SheetExcelData]: данные листов
+        """
+
+        export = ExportCalculationTemporaryPeriod
+        if not export.single_scan:
+            sheet_queries = export._get_sheet_queries(input_date)
+            results = ConnectorManager.get_raw_data_many(
+                [query for _, query in sheet_queries]
             )
-        )
+            return [
+                SheetExcelData(wells_loader=wells, sheet_name=name)
+                for (name, _), wells in zip(sheet_queries, results)
+            ]
 
-        sheet_info = [
-            (results[1], "Фонд"),
-            (results[2], "вр_приост_1"),
-            (results[3], "вр_приост_продление"),
-            (results[4.1], "вр_приост_2"),
-            (results[4.2], "вр_приост_2"),
-            (wells_output_temporary_period, "вывод_из_вр_приост"),
+        wells, wells_output = ConnectorManager.get_raw_frames_many(
+            [
+                export._get_classified_query(),
+                CalculationTemporaryPeriodLoader.get_wells_output_temporary_period(
+                    input_date
+                ),
+            ]
+        )
+        return [
+            *export._split_classified_wells(wells),
+            SheetExcelData(
+                wells_loader=wells_output.to_numpy(), sheet_name=export.output_sheet
+            ),
         ]
-        result_wells: list[SheetExcelData] = [
-            SheetExcelData(wells_loader=loader, sheet_name=name)
-            for loader, name in sheet_info
+
+    @staticmethod
+    def _get_classified_query() -> SqlQuery:
+        """
+        Запрос скважин с признаками листов
+
+        При CONNECTORX_PARTITION_NUM больше 1 фонд читается частями по диапазонам
+        id скважин, границы берутся по первичному ключу WellLatestStatus
+
+        Returns:
+            SqlQuery: запрос с настройками разбиения
+        """
+
+        loader = CalculationTemporaryPeriodLoader
+        query = SqlQuery(loader.get_wells_classified())
+        if settings.CONNECTORX_PARTITION_NUM <= 1:
+            return query
+
+        wells_range = WellLatestStatus.objects.aggregate(Min("well_id"), Max("well_id"))
+        if wells_range["well_id__min"] is None:
+            return query
+
+        return replace(
+            query,
+            partition_on=loader.well_id_column,
+            partition_num=settings.CONNECTORX_PARTITION_NUM,
+            partition_range=(wells_range["well_id__min"], wells_range["well_id__max"]),
+        )
+
+    @staticmethod
+    def _split_classified_wells(wells: pl.DataFrame) -> list[SheetExcelData]:
+        """
+        Разбивка результата get_wells_classified по листам
+
+        Args:
+            wells (pl.DataFrame): скважины с id и признаками листов
+
+        Returns:
+            list[SheetExcelData]: данные листов скважин в бездействии
+        """
+
+        extra_columns = [
+            CalculationTemporaryPeriodLoader.well_id_column,
+            *(
+                CalculationTemporaryPeriodLoader.get_flag_column(sheet_number)
+                for sheet_number in CalculationTemporaryPeriodLoader.delay_conditions
+            ),
         ]
 
-        last_date = ExportCalculationTemporaryPeriod.__get_last_date()
-        for wells in result_wells:
-            ExportCalculationTemporaryPeriod.__write_data_in_sheet(
-                wells.wells_loader, workbook[wells.sheet_name]
-            )
-            ExportCalculationTemporaryPeriod.__write_headers_with_date_sheet(
-                workbook[wells.sheet_name], last_date, input_date
+        result_wells: list[SheetExcelData] = []
+        for sheet_number, name in ExportCalculationTemporaryPeriod.wells_sheets:
+            sheet_wells = wells
+            if sheet_number in CalculationTemporaryPeriodLoader.delay_conditions:
+                sheet_wells = wells.filter(
+                    pl.col(
+                        CalculationTemporaryPeriodLoader.get_flag_column(sheet_number)
+                    )
+                )
+            result_wells.append(
+                SheetExcelData(
+                    wells_loader=sheet_wells.drop(extra_columns).to_numpy(),
+                    sheet_name=name,
+                )
             )
 
-        return workbook
+        return result_wells
+
+    @staticmethod
+    def _get_sheet_queries(input_date: date) -> list[tuple[str, str]]:
+        """
+        Запросы для листов отчета, отдельный запрос на каждый лист
+
+        Args:
+            input_date (date): дата для формирования листа "вывод_из_вр_приост"
+
+        Returns:
+            list[tuple[str, str]]: наименование листа и SQL-запрос
+        """
+
+        export = ExportCalculationTemporaryPeriod
+        return [
+            *(
+                (name, CalculationTemporaryPeriodLoader.get_wells(sheet_number))
+                for sheet_number, name in export.wells_sheets
+            ),
+            (
+                export.output_sheet,
+                CalculationTemporaryPeriodLoader.get_wells_output_temporary_period(
+                    input_date
+                ),
+            ),
+        ]
+
+    @staticmethod
+    def _write_sheet(
+        workbook: Workbook, wells: SheetExcelData, last_date: date, input_date: date
+    ) -> None:
+        """
+        Запись данных и шапки с датами на лист
+
+        Args:
+            workbook (Workbook): файл электронной таблицы
+            wells (SheetExcelData): данные листа
+            last_date (date): крайняя дата фонда ИНК
+            input_date (date): дата для формирования листа "вывод_из_вр_приост"
+        """
+
+        ExportCalculationTemporaryPeriod.__write_data_in_sheet(
+            wells.wells_loader, workbook[wells.sheet_name]
+        )
+        ExportCalculationTemporaryPeriod.__write_headers_with_date_sheet(
+            workbook[wells.sheet_name], last_date, input_date
+        )
 
     @staticmethod
     def __write_data_in_sheet(
@@ -131,7 +276,7 @@ class ExportCalculationTemporaryPeriod:
             )
 
     @staticmethod
-    def __get_last_date() -> date:
+    def _get_last_date() -> date:
         """
         Крайняя дата
 
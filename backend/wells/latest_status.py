@@ -0,0 +1,32 @@
+from typing import Optional
+
+from django.db import connection
+from wells.exceptions import LatestStatusNotSupported
+
+
+class WellLatestStatusRefresher:
+    """
+    Пересчет крайних состояний скважин (WellLatestStatus)
+
+    В postgres таблица поддерживается триггерами на WellsBaseFund, пересчет
+    вручную нужен только после записи в фонд в обход триггеров - TRUNCATE,
+    session_replication_role = replica и т.п.
+    """
+
+    @staticmethod
+    def refresh(well_ids: Optional[list[int]] = None) -> None:
+        """
+        Пересчет крайних состояний
+
+        Args:
+            well_ids (Optional[list[int]]): id скважин, по умолчанию весь фонд
+
+        Raises:
+            LatestStatusNotSupported: БД не postgres
+        """
+
+        if connection.vendor != "postgresql":
+            raise LatestStatusNotSupported(connection.vendor)
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT wells_refresh_latest_status(%s)", [well_ids])
@@ -0,0 +1,58 @@
+import json
+from datetime import date
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from wells.benchmark import ExportBenchmark
+
+
+class Command(BaseCommand):
+    """
+    Замер этапов отчета по временным приостановкам из ФОНДа ИНК
+
+    Данные берутся из БД, для замеров их можно сгенерировать командой
+    fill_wells_fund. Результат пишется в json, который можно сравнить
+    с прошлым запуском через --baseline
+    """
+
+    help = "Замер запросов, перевода в numpy, записи листов и сохранения отчета"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--input-date",
+            type=date.fromisoformat,
+            default=None,
+            help='Дата для листа "вывод_из_вр_приост"',
+        )
+        parser.add_argument("--repeat", type=int, default=3, help="Повторов замера")
+        parser.add_argument(
+            "--output", type=Path, default=None, help="Файл для результата в json"
+        )
+        parser.add_argument(
+            "--baseline", type=Path, default=None, help="json прошлого запуска"
+        )
+
+    def handle(self, *args, **options):
+        benchmark = ExportBenchmark(options["repeat"])
+        benchmark.run(options["input_date"])
+        result = benchmark.as_json()
+
+        for item in result["results"]:
+            self.stdout.write(
+                f"{item['case']} [{item['scale']}]: "
+                f"{item['median']:.3f} с, строк {item['rows']}"
+            )
+
+        if options["output"] is not None:
+            options["output"].write_text(
+                json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8"
+            )
+
+        if options["baseline"] is not None:
+            baseline = json.loads(options["baseline"].read_text(encoding="utf-8"))
+            for item in ExportBenchmark.compare(result, baseline):
+                self.stdout.write(
+                    f"{item['case']} [{item['scale']}]: "
+                    f"{item['baseline']:.3f} -> {item['current']:.3f} с "
+                    f"(x{item['ratio']})"
+                )
@@ -0,0 +1,53 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from wells.plans import ReportPlans
+
+
+class Command(BaseCommand):
+    """
+    Проверка планов запросов отчета по временным приостановкам
+    """
+
+    help = "EXPLAIN запросов отчета: условия по фонду должны ложиться на индексы"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            type=date.fromisoformat,
+            default=None,
+            help="Дата для листа вывода из приостановки, по умолчанию начало месяца",
+        )
+        parser.add_argument(
+            "--enable-seqscan",
+            action="store_true",
+            help="Не запрещать чтение таблиц целиком: планы как на проде, без проверки",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Запросы отчета выполняются только на postgres")
+
+        input_date = options["date"] or date.today().replace(day=1)
+        checks = ReportPlans.explain(
+            ReportPlans.get_checks(input_date), options["enable_seqscan"]
+        )
+
+        for check in checks:
+            self.stdout.write(
+                f"{'OK' if check.is_ok else 'FAIL'} {check.name}: "
+                f"{', '.join(sorted(check.indexes)) or '-'}"
+            )
+            if check.missing_indexes:
+                self.stdout.write(
+                    f"    нет индексов: {', '.join(sorted(check.missing_indexes))}"
+                )
+            if check.seq_scans:
+                self.stdout.write(
+                    f"    чтение целиком: {', '.join(sorted(check.seq_scans))}"
+                )
+
+        failed = [check.name for check in checks if not check.is_ok]
+        if failed and not options["enable_seqscan"]:
+            raise CommandError(f"Запросы без индексов: {', '.join(failed)}")
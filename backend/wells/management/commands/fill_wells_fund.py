@@ -0,0 +1,54 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from wells.benchmark import SyntheticFund
+
+
+class Command(BaseCommand):
+    """
+    Заполнение фонда скважин ИНК сгенерированными данными
+    """
+
+    help = "Скважины с помесячными состояниями для замеров отчетов по фонду"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--wells", type=int, default=10_000, help="Скважин")
+        parser.add_argument(
+            "--months", type=int, default=24, help="Помесячных состояний скважины"
+        )
+        parser.add_argument(
+            "--end-date",
+            type=date.fromisoformat,
+            default=None,
+            help="Дата последнего состояния, по умолчанию начало текущего месяца",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Зерно генератора")
+        parser.add_argument(
+            "--prefix",
+            default="synthetic",
+            help="Префикс наименований сгенерированных данных",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Удалить ранее сгенерированные данные с тем же префиксом",
+        )
+
+    def handle(self, *args, **options):
+        fund = SyntheticFund(
+            wells=options["wells"],
+            months=options["months"],
+            end_date=options["end_date"],
+            seed=options["seed"],
+            prefix=options["prefix"],
+        )
+
+        if fund.exists():
+            if not options["clear"]:
+                raise CommandError(
+                    f"Данные с префиксом {fund.prefix} уже есть, используйте --clear"
+                )
+            fund.clear()
+
+        for model, count in fund.fill().items():
+            self.stdout.write(f"{model}: {count}")
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from wells.exceptions import LatestStatusNotSupported
+from wells.latest_status import WellLatestStatusRefresher
+from wells.models import WellLatestStatus
+
+
+class Command(BaseCommand):
+    """
+    Пересчет крайних состояний скважин по фонду ИНК
+    """
+
+    help = "Пересчет WellLatestStatus после записи в фонд в обход триггеров"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--wells",
+            type=int,
+            nargs="+",
+            default=None,
+            help="id скважин, по умолчанию весь фонд",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            WellLatestStatusRefresher.refresh(options["wells"])
+        except LatestStatusNotSupported as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(f"well_latest_status: {WellLatestStatus.objects.count()}")
@@ -0,0 +1,223 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# пересчет крайних состояний переданных скважин, NULL - всего фонда
+CREATE_REFRESH_FUNCTION = """
+    CREATE OR REPLACE FUNCTION wells_refresh_latest_status(well_ids bigint[])
+    RETURNS void AS $$
+    BEGIN
+        IF well_ids IS NULL THEN
+            DELETE FROM wells_welllateststatus;
+            well_ids := ARRAY(SELECT DISTINCT well_id FROM wells_wellsbasefund);
+        ELSE
+            -- у скважины не осталось состояний
+            DELETE FROM wells_welllateststatus wls
+            WHERE
+                wls.well_id = ANY(well_ids)
+                AND NOT EXISTS (
+                    SELECT 1 FROM wells_wellsbasefund wbf
+                    WHERE wbf.well_id = wls.well_id
+                );
+        END IF;
+
+        WITH RankedWellsBaseFund AS (
+            SELECT
+                wbf.well_id,
+                wbf.date,
+                wbf.status_id,
+                ws.fund,
+                ROW_NUMBER() OVER (
+                    PARTITION BY wbf.well_id ORDER BY wbf.date DESC
+                ) AS rank
+            FROM wells_wellsbasefund wbf
+            JOIN wells_wellsstatus ws ON wbf.status_id = ws.id
+            WHERE wbf.well_id = ANY(well_ids)
+        )
+        INSERT INTO wells_welllateststatus (
+            well_id, date, status_id, fund,
+            previous_date, previous_status_id, previous_fund
+        )
+        SELECT
+            lwbf.well_id, lwbf.date, lwbf.status_id, lwbf.fund,
+            pwbf.date, pwbf.status_id, pwbf.fund
+        FROM RankedWellsBaseFund lwbf
+        LEFT JOIN RankedWellsBaseFund pwbf
+            ON lwbf.well_id = pwbf.well_id AND pwbf.rank = 2
+        WHERE lwbf.rank = 1
+        ON CONFLICT (well_id) DO UPDATE SET
+            date = EXCLUDED.date,
+            status_id = EXCLUDED.status_id,
+            fund = EXCLUDED.fund,
+            previous_date = EXCLUDED.previous_date,
+            previous_status_id = EXCLUDED.previous_status_id,
+            previous_fund = EXCLUDED.previous_fund;
+    END;
+    $$ LANGUAGE plpgsql;
+"""
+
+# триггеры уровня оператора: bulk_create или COPY на тысячи строк пересчитывает
+# каждую затронутую скважину один раз. Таблицы переходов нельзя объявить
+# у триггера на несколько событий, поэтому триггеров три на одну функцию
+CREATE_TRIGGERS = """
+    CREATE OR REPLACE FUNCTION wells_wellsbasefund_refresh_latest_status()
+    RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            PERFORM wells_refresh_latest_status(
+                ARRAY(SELECT DISTINCT well_id FROM new_rows)
+            );
+        ELSIF TG_OP = 'UPDATE' THEN
+            PERFORM wells_refresh_latest_status(
+                ARRAY(SELECT well_id FROM new_rows UNION SELECT well_id FROM old_rows)
+            );
+        ELSE
+            PERFORM wells_refresh_latest_status(
+                ARRAY(SELECT DISTINCT well_id FROM old_rows)
+            );
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE TRIGGER wells_wellsbasefund_latest_status_insert
+    AFTER INSERT ON wells_wellsbasefund
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION wells_wellsbasefund_refresh_latest_status();
+
+    CREATE TRIGGER wells_wellsbasefund_latest_status_update
+    AFTER UPDATE ON wells_wellsbasefund
+    REFERENCING NEW TABLE AS new_rows OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION wells_wellsbasefund_refresh_latest_status();
+
+    CREATE TRIGGER wells_wellsbasefund_latest_status_delete
+    AFTER DELETE ON wells_wellsbasefund
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION wells_wellsbasefund_refresh_latest_status();
+"""
+
+DROP_TRIGGERS = """
+    DROP TRIGGER IF EXISTS wells_wellsbasefund_latest_status_insert
+        ON wells_wellsbasefund;
+    DROP TRIGGER IF EXISTS wells_wellsbasefund_latest_status_update
+        ON wells_wellsbasefund;
+    DROP TRIGGER IF EXISTS wells_wellsbasefund_latest_status_delete
+        ON wells_wellsbasefund;
+    DROP FUNCTION IF EXISTS wells_wellsbasefund_refresh_latest_status();
+    DROP FUNCTION IF EXISTS wells_refresh_latest_status(bigint[]);
+"""
+
+
+def create_triggers(apps, schema_editor):
+    """
+    Функция пересчета, триггеры на фонде и заполнение по текущему фонду
+
+    Отчеты по фонду работают только на postgres, на остальных БД таблица
+    остается пустой
+    """
+
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(CREATE_REFRESH_FUNCTION)
+    schema_editor.execute(CREATE_TRIGGERS)
+    schema_editor.execute("SELECT wells_refresh_latest_status(NULL)")
+
+
+def drop_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(DROP_TRIGGERS)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("wells", "0002_characteristicbasefund"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WellLatestStatus",
+            fields=[
+                (
+                    "well",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="latest_status",
+                        serialize=False,
+                        to="wells.well",
+                        verbose_name="Ссылка на скважину",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="Дата крайнего состояния")),
+                (
+                    "fund",
+                    models.IntegerField(
+                        choices=[
+                            (0, "ВДЗ"),
+                            (1, "ВЗ"),
+                            (2, "ГД"),
+                            (3, "ГН"),
+                            (4, "НД"),
+                            (5, "НН"),
+                            (6, "ПОГЛ"),
+                            (7, "РД"),
+                            (8, "РН"),
+                        ],
+                        verbose_name="Крайний фонд",
+                    ),
+                ),
+                (
+                    "previous_date",
+                    models.DateField(
+                        null=True, verbose_name="Дата предыдущего состояния"
+                    ),
+                ),
+                (
+                    "previous_fund",
+                    models.IntegerField(
+                        choices=[
+                            (0, "ВДЗ"),
+                            (1, "ВЗ"),
+                            (2, "ГД"),
+                            (3, "ГН"),
+                            (4, "НД"),
+                            (5, "НН"),
+                            (6, "ПОГЛ"),
+                            (7, "РД"),
+                            (8, "РН"),
+                        ],
+                        null=True,
+                        verbose_name="Предыдущий фонд",
+                    ),
+                ),
+                (
+                    "previous_status",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="wells.wellsstatus",
+                        verbose_name="Предыдущая категория",
+                    ),
+                ),
+                (
+                    "status",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="wells.wellsstatus",
+                        verbose_name="Крайняя категория",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Крайнее состояние скважины",
+                "verbose_name_plural": "Крайние состояния скважин",
+            },
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -0,0 +1,136 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:30
+
+from importlib import import_module
+
+import django.db.models.deletion
+from django.contrib.postgres import operations as postgres_operations
+from django.db import migrations, models
+from django.db.migrations.operations import AddIndex
+
+# крайнее и предыдущее состояния берутся двумя чтениями индекса
+# wbf_well_date_desc_idx на скважину вместо сортировки всей ее истории
+CREATE_REFRESH_FUNCTION = """
+    CREATE OR REPLACE FUNCTION wells_refresh_latest_status(well_ids bigint[])
+    RETURNS void AS $$
+    BEGIN
+        IF well_ids IS NULL THEN
+            DELETE FROM wells_welllateststatus;
+            well_ids := ARRAY(SELECT id FROM wells_well);
+        ELSE
+            -- у скважины не осталось состояний
+            DELETE FROM wells_welllateststatus wls
+            WHERE
+                wls.well_id = ANY(well_ids)
+                AND NOT EXISTS (
+                    SELECT 1 FROM wells_wellsbasefund wbf
+                    WHERE wbf.well_id = wls.well_id
+                );
+        END IF;
+
+        INSERT INTO wells_welllateststatus (
+            well_id, date, status_id, fund,
+            previous_date, previous_status_id, previous_fund
+        )
+        SELECT
+            w.well_id, lwbf.date, lwbf.status_id, lwbf.fund,
+            pwbf.date, pwbf.status_id, pwbf.fund
+        FROM (SELECT DISTINCT UNNEST(well_ids) AS well_id) w
+        JOIN LATERAL (
+            SELECT wbf.date, wbf.status_id, ws.fund
+            FROM wells_wellsbasefund wbf
+            JOIN wells_wellsstatus ws ON wbf.status_id = ws.id
+            WHERE wbf.well_id = w.well_id
+            ORDER BY wbf.date DESC
+            LIMIT 1
+        ) lwbf ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT wbf.date, wbf.status_id, ws.fund
+            FROM wells_wellsbasefund wbf
+            JOIN wells_wellsstatus ws ON wbf.status_id = ws.id
+            WHERE wbf.well_id = w.well_id
+            ORDER BY wbf.date DESC
+            OFFSET 1
+            LIMIT 1
+        ) pwbf ON TRUE
+        ON CONFLICT (well_id) DO UPDATE SET
+            date = EXCLUDED.date,
+            status_id = EXCLUDED.status_id,
+            fund = EXCLUDED.fund,
+            previous_date = EXCLUDED.previous_date,
+            previous_status_id = EXCLUDED.previous_status_id,
+            previous_fund = EXCLUDED.previous_fund;
+    END;
+    $$ LANGUAGE plpgsql;
+"""
+
+
+class AddIndexConcurrently(postgres_operations.AddIndexConcurrently):
+    """
+    Индекс без блокировки записи в фонд на postgres, на остальных БД - AddIndex
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            AddIndex.database_forwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            AddIndex.database_backwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+
+
+def replace_refresh_function(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(CREATE_REFRESH_FUNCTION)
+
+
+def restore_refresh_function(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    previous = import_module("wells.migrations.0003_well_latest_status")
+    schema_editor.execute(previous.CREATE_REFRESH_FUNCTION)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не выполняется внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("wells", "0003_well_latest_status"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="wellsbasefund",
+            index=models.Index(fields=["well", "-date"], name="wbf_well_date_desc_idx"),
+        ),
+        migrations.AlterField(
+            model_name="wellsbasefund",
+            name="well",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="wells.well",
+                verbose_name="Ссылка на скважину",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="wellsbasefund",
+            index=models.Index(
+                fields=["date", "status"], include=("well",), name="wbf_date_status_idx"
+            ),
+        ),
+        migrations.RunPython(
+            replace_refresh_function, restore_refresh_function, atomic=True
+        ),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:00
+
+from importlib import import_module
+
+from django.db import migrations
+
+# триггер пересчитывает состояния по снимку своего запроса, и под READ COMMITTED
+# две транзакции, пишущие в фонд одной скважины, затирали друг друга устаревшим
+# предыдущим состоянием. Пересчет блокирует строки скважин в wells_well: блокировки
+# строк не занимают общую таблицу блокировок, как advisory-блокировки на каждую
+# скважину при загрузке всего фонда, и не мешают проверкам внешних ключей
+# (FOR KEY SHARE) при записи в фонд
+CREATE_REFRESH_FUNCTION = """
+    CREATE OR REPLACE FUNCTION wells_refresh_latest_status(well_ids bigint[])
+    RETURNS void AS $$
+    BEGIN
+        -- параллельные пересчеты одной скважины идут по очереди: следующий
+        -- ждет фиксации предыдущего и читает фонд уже с его записями
+        IF well_ids IS NULL THEN
+            LOCK TABLE wells_welllateststatus IN EXCLUSIVE MODE;
+            DELETE FROM wells_welllateststatus;
+            well_ids := ARRAY(SELECT id FROM wells_well);
+        ELSE
+            PERFORM 1
+            FROM wells_well
+            WHERE id = ANY(well_ids)
+            ORDER BY id
+            FOR NO KEY UPDATE;
+
+            -- у скважины не осталось состояний
+            DELETE FROM wells_welllateststatus wls
+            WHERE
+                wls.well_id = ANY(well_ids)
+                AND NOT EXISTS (
+                    SELECT 1 FROM wells_wellsbasefund wbf
+                    WHERE wbf.well_id = wls.well_id
+                );
+        END IF;
+
+        INSERT INTO wells_welllateststatus (
+            well_id, date, status_id, fund,
+            previous_date, previous_status_id, previous_fund
+        )
+        SELECT
+            w.well_id, lwbf.date, lwbf.status_id, lwbf.fund,
+            pwbf.date, pwbf.status_id, pwbf.fund
+        FROM (SELECT DISTINCT UNNEST(well_ids) AS well_id) w
+        JOIN LATERAL (
+            SELECT wbf.date, wbf.status_id, ws.fund
+            FROM wells_wellsbasefund wbf
+            JOIN wells_wellsstatus ws ON wbf.status_id = ws.id
+            WHERE wbf.well_id = w.well_id
+            ORDER BY wbf.date DESC
+            LIMIT 1
+        ) lwbf ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT wbf.date, wbf.status_id, ws.fund
+            FROM wells_wellsbasefund wbf
+            JOIN wells_wellsstatus ws ON wbf.status_id = ws.id
+            WHERE wbf.well_id = w.well_id
+            ORDER BY wbf.date DESC
+            OFFSET 1
+            LIMIT 1
+        ) pwbf ON TRUE
+        ON CONFLICT (well_id) DO UPDATE SET
+            date = EXCLUDED.date,
+            status_id = EXCLUDED.status_id,
+            fund = EXCLUDED.fund,
+            previous_date = EXCLUDED.previous_date,
+            previous_status_id = EXCLUDED.previous_status_id,
+            previous_fund = EXCLUDED.previous_fund;
+    END;
+    $$ LANGUAGE plpgsql;
+"""
+
+
+def replace_refresh_function(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(CREATE_REFRESH_FUNCTION)
+
+
+def restore_refresh_function(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    previous = import_module("wells.migrations.0004_report_indexes")
+    schema_editor.execute(previous.CREATE_REFRESH_FUNCTION)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("wells", "0004_report_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(replace_refresh_function, restore_refresh_function),
+    ]
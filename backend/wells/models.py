@@ -255,6 +255,8 @@ class WellsBaseFund(DomainModel):
         to=Well,
         on_delete=models.CASCADE,
         verbose_name="Ссылка на скважину",
+        # поиск по скважине идет по wbf_well_date_desc_idx
+        db_index=False,
     )
     status = models.ForeignKey(
         to=WellsStatus, on_delete=models.DO_NOTHING, verbose_name="Категория"
@@ -269,3 +271,58 @@ class WellsBaseFund(DomainModel):
         constraints = [
             models.UniqueConstraint(fields=["date", "well"], name="unique_date_well")
         ]
+        indexes = [
+            # состояния скважины от крайнего, пересчет WellLatestStatus
+            models.Index(fields=["well", "-date"], name="wbf_well_date_desc_idx"),
+            # скважины в статусах на дату без чтения строк таблицы
+            models.Index(
+                fields=["date", "status"],
+                include=["well"],
+                name="wbf_date_status_idx",
+            ),
+        ]
+
+
+class WellLatestStatus(models.Model):
+    """
+    Крайнее и предыдущее состояния скважины в фонде ИНК
+
+    Денормализация WellsBaseFund для отчетов: в postgres строки пересчитываются
+    триггером при каждой записи в фонд (см. миграцию 0003), вручную не правятся
+    """
+
+    well = models.OneToOneField(
+        to=Well,
+        primary_key=True,
+        related_name="latest_status",
+        on_delete=models.CASCADE,
+        verbose_name="Ссылка на скважину",
+    )
+    date = models.DateField(verbose_name="Дата крайнего состояния")
+    status = models.ForeignKey(
+        to=WellsStatus,
+        on_delete=models.DO_NOTHING,
+        related_name="+",
+        verbose_name="Крайняя категория",
+    )
+    fund = models.IntegerField(choices=FundList.choices, verbose_name="Крайний фонд")
+    previous_date = models.DateField(
+        null=True, verbose_name="Дата предыдущего состояния"
+    )
+    previous_status = models.ForeignKey(
+        to=WellsStatus,
+        null=True,
+        on_delete=models.DO_NOTHING,
+        related_name="+",
+        verbose_name="Предыдущая категория",
+    )
+    previous_fund = models.IntegerField(
+        null=True, choices=FundList.choices, verbose_name="Предыдущий фонд"
+    )
+
+    def __str__(self) -> str:
+        return f"{self.well}, {self.date}"
+
+    class Meta:
+        verbose_name = "Крайнее состояние скважины"
+        verbose_name_plural = "Крайние состояния скважин"
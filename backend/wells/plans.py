@@ -0,0 +1,156 @@
+import json
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Optional
+
+from django.db import connection, transaction
+from wells.models import CharacteristicBaseFund, WellLatestStatus, WellsBaseFund
+from wells.queries import CalculationTemporaryPeriodLoader
+
+
+@dataclass
+class PlanCheck:
+    """
+    Проверка плана одного запроса
+
+    Attributes:
+        name (str): наименование запроса
+        query (str): SQL-запрос
+        params (Optional[list]): параметры запроса
+        expected_indexes (tuple[str, ...]): индексы, которые должны быть в плане
+        indexes (set[str]): индексы, по которым в плане идет поиск
+        seq_scans (set[str]): таблицы фонда, читаемые целиком
+    """
+
+    name: str
+    query: str
+    params: Optional[list] = None
+    expected_indexes: tuple[str, ...] = ()
+    indexes: set[str] = field(default_factory=set)
+    seq_scans: set[str] = field(default_factory=set)
+
+    @property
+    def missing_indexes(self) -> set[str]:
+        return set(self.expected_indexes) - self.indexes
+
+    @property
+    def is_ok(self) -> bool:
+        return not self.missing_indexes and not self.seq_scans
+
+
+class ReportPlans:
+    """
+    Проверка через EXPLAIN, что запросы отчета по временным приостановкам
+    могут идти по индексам фонда
+
+    На небольшом фонде postgres честно выбирает чтение таблиц целиком, поэтому
+    по умолчанию планы строятся с enable_seqscan = off: если условие запроса
+    не ложится на индекс, в плане остается чтение таблицы или всего индекса
+    без Index Cond, и проверка падает
+    """
+
+    fund_tables: tuple[str, ...] = (
+        WellsBaseFund._meta.db_table,
+        WellLatestStatus._meta.db_table,
+        CharacteristicBaseFund._meta.db_table,
+    )
+
+    @classmethod
+    def get_checks(cls, input_date: date) -> list[PlanCheck]:
+        """
+        Запросы отчета и индексы, которые они должны использовать
+
+        Args:
+            input_date (date): дата для листа "вывод_из_вр_приост"
+
+        Returns:
+            list[PlanCheck]: проверки
+        """
+
+        loader = CalculationTemporaryPeriodLoader
+        # листы по срокам приостановки сравнивают их с крайней датой каждой
+        # скважины, а не с одной датой фонда, поэтому индексы по срокам им не
+        # помогают: проверяется только, что фонд не читается целиком
+        checks = [
+            PlanCheck(f"get_wells({number})", loader.get_wells(number))
+            for number in (1, *loader.delay_conditions)
+        ]
+        checks.append(PlanCheck("get_wells_classified", loader.get_wells_classified()))
+        checks.append(
+            PlanCheck(
+                "get_wells_output_temporary_period(None)",
+                loader.get_wells_output_temporary_period(None),
+            )
+        )
+        checks.append(
+            PlanCheck(
+                f"get_wells_output_temporary_period({input_date})",
+                loader.get_wells_output_temporary_period(input_date),
+                expected_indexes=("wbf_date_status_idx",),
+            )
+        )
+
+        # так же читает фонд пересчет WellLatestStatus (миграция 0004)
+        checks.append(
+            PlanCheck(
+                "wells_refresh_latest_status",
+                f"""
+                    SELECT wbf.date, wbf.status_id
+                    FROM {WellsBaseFund._meta.db_table} wbf
+                    WHERE wbf.well_id = 1
+                    ORDER BY wbf.date DESC
+                    LIMIT 2
+                """,
+                expected_indexes=("wbf_well_date_desc_idx",),
+            )
+        )
+
+        return checks
+
+    @classmethod
+    def explain(
+        cls, checks: list[PlanCheck], enable_seqscan: bool = False
+    ) -> list[PlanCheck]:
+        """
+        Заполнение проверок по планам запросов
+
+        Args:
+            checks (list[PlanCheck]): проверки
+            enable_seqscan (bool): строить планы без запрета чтения таблиц целиком
+
+        Returns:
+            list[PlanCheck]: проверки с индексами и чтениями таблиц из планов
+        """
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            if not enable_seqscan:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+            for check in checks:
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {check.query}", check.params)
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                cls.__collect(plan[0]["Plan"], check)
+
+        return checks
+
+    @classmethod
+    def __collect(cls, node: dict, check: PlanCheck) -> None:
+        """
+        Обход узлов плана
+
+        Args:
+            node (dict): узел плана
+            check (PlanCheck): проверка
+        """
+
+        # индекс без Index Cond читается целиком, например частичный индекс
+        # под условие, которое на него не ложится
+        if "Index Cond" in node:
+            check.indexes.add(node["Index Name"])
+        if node["Node Type"] == "Seq Scan" and node["Relation Name"] in cls.fund_tables:
+            check.seq_scans.add(node["Relation Name"])
+
+        for child in node.get("Plans", []):
+            cls.__collect(child, check)
@@ -1,11 +1,13 @@
 from datetime import date
 
+from dateutil.relativedelta import relativedelta
 from wells.models import (
     CharacteristicBaseFund,
     District,
     Field,
     Pad,
     Well,
+    WellLatestStatus,
     WellsBaseFund,
     WellsStatus,
     WellsStatuses,
@@ -28,6 +30,20 @@ class CalculationTemporaryPeriodLoader:
         "Простой",
     )
 
+    # условия попадания скважины на листы отчета, кроме первого - там все скважины.
+    # Сроки приостановки сравниваются с крайней датой каждой скважины; даты фонда -
+    # первые числа месяцев, поэтому "delay_period - 1 месяц = дата" равносильно
+    # "delay_period = дата + 1 месяц"
+    delay_conditions: dict[float, str] = {
+        2: "cbf.delay_start = lws.date",
+        3: "cbf.delay_period = (lws.date + INTERVAL '1 month')::date",
+        4.1: "cbf.delay_period <= lws.date",
+        4.2: "cbf.delay_start < lws.date AND cbf.delay_period IS NULL",
+    }
+
+    # колонка id скважины в get_wells_classified
+    well_id_column: str = "well_id"
+
     @classmethod
     def get_wells(cls, sheet_number: float = 1) -> str:
         """
@@ -40,25 +56,67 @@ class CalculationTemporaryPeriodLoader:
                 str: сформированный SQL-запрос
         """
 
-        delay_conditions = {
-            2: "cbf.delay_start = lwbf.latest_date",
-            3: "lwbf.latest_date = cbf.delay_period - INTERVAL '1 month'",
-            4.1: "cbf.delay_period <= lwbf.latest_date",
-            4.2: "cbf.delay_start < lwbf.latest_date AND cbf.delay_period IS NULL",
-        }
-
-        delay_condition = delay_conditions.get(sheet_number, "")
+        delay_condition = cls.delay_conditions.get(sheet_number, "")
         if delay_condition:
             delay_condition = delay_condition + " AND"
 
+        return cls.__get_wells_query(delay_condition=delay_condition)
+
+    @classmethod
+    def get_wells_classified(cls) -> str:
+        """
+        Выгрузка скважин для всех листов отчета одним проходом по фонду
+
+        Вместо отдельного запроса на каждый лист возвращаются скважины первого
+        листа с признаком попадания на каждый из остальных (get_flag_column)
+        и id скважины, по диапазонам которого чтение можно разбить на части
+
+        Returns:
+                str: сформированный SQL-запрос
+        """
+
+        columns = [
+            f"lws.well_id AS {cls.well_id_column}",
+            *(
+                f"({condition}) IS TRUE AS {cls.get_flag_column(number)}"
+                for number, condition in cls.delay_conditions.items()
+            ),
+        ]
+        flags = "".join(f",\n                {column}" for column in columns)
+
+        return cls.__get_wells_query(flags=flags)
+
+    @staticmethod
+    def get_flag_column(sheet_number: float) -> str:
+        """
+        Колонка с признаком попадания скважины на лист в get_wells_classified
+
+        Args:
+            sheet_number (float): номер листа
+
+        Returns:
+            str: наименование колонки
+        """
+
+        return f"is_sheet_{str(sheet_number).replace('.', '_')}"
+
+    @classmethod
+    def __get_wells_query(cls, delay_condition: str = "", flags: str = "") -> str:
+        """
+        Запрос скважин в бездействии и ожидании освоения на крайнюю дату фонда
+
+        Крайнее состояние скважины берется из WellLatestStatus, без агрегации
+        истории фонда
+
+        Args:
+            delay_condition (str): дополнительное условие отбора, с AND на конце
+            flags (str): дополнительные колонки, с запятой в начале
+
+        Returns:
+                str: сформированный SQL-запрос
+        """
+
         return f"""
-            WITH LatestWellsBaseFund AS (
-                SELECT
-                    well_id,
-                    MAX(date) AS latest_date
-                FROM {WellsBaseFund._meta.db_table}
-                GROUP BY well_id
-            )
             SELECT
                 d.short_name as license_name,
                 f.short_name as field_name,
@@ -68,16 +126,15 @@ class CalculationTemporaryPeriodLoader:
                 ws.name as status_name,
                 cbf.building_end_date AS end_date,
                 cbf.delay_period AS delay_period,
-                cbf.delay_start AS delay_start
-            FROM {WellsBaseFund._meta.db_table} wbf
-            JOIN {Well._meta.db_table} w ON wbf.well_id = w.id
+                cbf.delay_start AS delay_start{flags}
+            FROM {WellLatestStatus._meta.db_table} lws
+            JOIN {Well._meta.db_table} w ON lws.well_id = w.id
             JOIN {Pad._meta.db_table} p ON w.wellpad_id = p.id
             JOIN {Field._meta.db_table} f ON p.field_id = f.id
             JOIN {District._meta.db_table} d ON p.license_id = d.id
-            JOIN {WellsStatus._meta.db_table} ws ON wbf.status_id = ws.id
+            JOIN {WellsStatus._meta.db_table} ws ON lws.status_id = ws.id
             JOIN {WellsStatuses._meta.db_table} wss ON ws.status_id = wss.id
-            JOIN {CharacteristicBaseFund._meta.db_table} cbf ON wbf.well_id = cbf.well_id
-            JOIN LatestWellsBaseFund lwbf ON wbf.well_id = lwbf.well_id AND wbf.date = lwbf.latest_date
+            JOIN {CharacteristicBaseFund._meta.db_table} cbf ON lws.well_id = cbf.well_id
             WHERE
                 {delay_condition}
                 wss.name IN {cls.need_statuses}
@@ -96,66 +153,47 @@ class CalculationTemporaryPeriodLoader:
         """
 
         if input_date:
-            formatted_input_date = input_date.strftime("'%Y-%m-%d'")
-            filter_latest_well = f"si.date = {formatted_input_date}"
-            select_previous_well = "si.status_fund AS previous_status"
-            filter_previous_well = f"""
-                FROM StatusInfo si
-                WHERE
-                    si.date + INTERVAL '1 month' = {formatted_input_date}
+            # состояния на дату и на месяц раньше выбираются по индексу фонда,
+            # каждое своим запросом - общий CTE по всей истории postgres
+            # материализует и ошибается в оценке строк
+            latest_wells = cls.__get_statuses_on_date(
+                input_date, cls.statuses_work_simple, "last_status"
+            )
+            previous_wells = cls.__get_statuses_on_date(
+                input_date - relativedelta(months=1),
+                cls.need_statuses,
+                "previous_status",
+            )
+            status_info = f"""
+                WITH LatestWellsBaseFund AS ({latest_wells}),
+                PreviousWellsBaseFund AS ({previous_wells})
             """
         else:
-            filter_latest_well = f"""(si.well_id, si.date) IN (
-                                        SELECT
-                                            well_id,
-                                            MAX(date) AS latest_date
-                                        FROM
-                                            {WellsBaseFund._meta.db_table}
-                                        GROUP BY
-                                            well_id
-                                    )"""
-            select_previous_well = "si.previous_status"
-            filter_previous_well = """
-                FROM (
+            # крайнее и предыдущее состояния уже посчитаны в WellLatestStatus
+            status_info = f"""
+                WITH LatestWellsBaseFund AS (
                     SELECT
-                        well_id,
-                        ROW_NUMBER() OVER (PARTITION BY well_id ORDER BY date DESC) AS rank,
-                        status_name,
-                        status_fund AS previous_status
-                    FROM
-                        StatusInfo
-                ) si
-                WHERE
-                    si.rank = 2
+                        lws.well_id,
+                        ws.name AS last_status
+                    FROM {WellLatestStatus._meta.db_table} lws
+                    JOIN {WellsStatus._meta.db_table} ws ON lws.status_id = ws.id
+                    JOIN {WellsStatuses._meta.db_table} wss ON ws.status_id = wss.id
+                    WHERE
+                        wss.name IN {cls.statuses_work_simple}
+                ),
+                PreviousWellsBaseFund AS (
+                    SELECT
+                        lws.well_id,
+                        ws.name AS previous_status
+                    FROM {WellLatestStatus._meta.db_table} lws
+                    JOIN {WellsStatus._meta.db_table} ws ON lws.previous_status_id = ws.id
+                    JOIN {WellsStatuses._meta.db_table} wss ON ws.status_id = wss.id
+                    WHERE
+                        wss.name IN {cls.need_statuses}
+                )
             """
 
-        return f"""
-            WITH StatusInfo AS (
-                SELECT
-                    wbf.well_id,
-                    wbf.date,
-                    wss.name AS status_name,
-                    ws.name AS status_fund
-                FROM {WellsBaseFund._meta.db_table} wbf
-                JOIN {WellsStatus._meta.db_table} ws ON wbf.status_id = ws.id
-                JOIN {WellsStatuses._meta.db_table} wss ON ws.status_id = wss.id
-            ),
-            LatestWellsBaseFund AS (
-                SELECT
-                    si.well_id,
-                    si.status_fund AS last_status
-                FROM StatusInfo si
-                WHERE
-                    {filter_latest_well}
-                    AND si.status_name IN {cls.statuses_work_simple}
-            ),
-            PreviousWellsBaseFund AS (
-                SELECT
-                    si.well_id,
-                    {select_previous_well}
-                {filter_previous_well}
-                AND si.status_name IN {cls.need_statuses}
-            )
+        return f"""{status_info}
             SELECT
                 d.short_name as license_name,
                 f.short_name as field_name,
@@ -174,3 +212,31 @@ class CalculationTemporaryPeriodLoader:
             WHERE
                 cbf.delay_period IS NOT NULL
         """
+
+    @staticmethod
+    def __get_statuses_on_date(
+        status_date: date, statuses: tuple[str, ...], alias: str
+    ) -> str:
+        """
+        Запрос скважин, состояние которых на дату входит в переданные статусы
+
+        Args:
+            status_date (date): дата состояния
+            statuses (tuple[str, ...]): наименования статусов (WellsStatuses)
+            alias (str): наименование колонки со статусом фонда
+
+        Returns:
+                str: сформированный SQL-запрос
+        """
+
+        return f"""
+            SELECT
+                wbf.well_id,
+                ws.name AS {alias}
+            FROM {WellsBaseFund._meta.db_table} wbf
+            JOIN {WellsStatus._meta.db_table} ws ON wbf.status_id = ws.id
+            JOIN {WellsStatuses._meta.db_table} wss ON ws.status_id = wss.id
+            WHERE
+                wbf.date = {status_date.strftime("'%Y-%m-%d'")}
+                AND wss.name IN {statuses}
+        """
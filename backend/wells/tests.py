@@ -1,3 +1,57 @@
+from datetime import date
+from unittest import skipUnless
+
+from django.db import connection
 from django.test import TestCase
+from wells.benchmark import SyntheticFund
+from wells.models import WellsBaseFund
+from wells.plans import PlanCheck, ReportPlans
+
+
+@skipUnless(connection.vendor == "postgresql", "планы запросов строятся на postgres")
+class ReportPlansTest(TestCase):
+    """
+    Проверка планов запросов отчета по временным приостановкам
+    """
+
+    input_date = date(2026, 10, 1)
+
+    def test_report_queries_use_indexes(self):
+        # на пустых таблицах планы не похожи на планы по настоящему фонду
+        SyntheticFund(wells=300, months=6, end_date=self.input_date).fill()
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        checks = {
+            check.name: check
+            for check in ReportPlans.explain(ReportPlans.get_checks(self.input_date))
+        }
+
+        self.assertEqual(
+            [name for name, check in checks.items() if not check.is_ok], []
+        )
+        self.assertIn(
+            "wbf_date_status_idx",
+            checks[f"get_wells_output_temporary_period({self.input_date})"].indexes,
+        )
+        self.assertIn(
+            "wbf_well_date_desc_idx", checks["wells_refresh_latest_status"].indexes
+        )
+
+    def test_condition_without_index(self):
+        # выражение над колонкой не ложится на индекс по ней
+        check = PlanCheck(
+            "date + 0",
+            f"""
+                SELECT wbf.well_id
+                FROM {WellsBaseFund._meta.db_table} wbf
+                WHERE wbf.date + 0 = %s::date
+            """,
+            params=[self.input_date],
+            expected_indexes=("wbf_date_status_idx",),
+        )
+
+        (check,) = ReportPlans.explain([check])
 
-# Create your tests here.
+        self.assertFalse(check.is_ok)
+        self.assertEqual(check.missing_indexes, {"wbf_date_status_idx"})